@@ -0,0 +1,152 @@
+"""Checks that ContentParser.summarize gives the same summaries as feeding the whole diff to the previous ContentParser
+and compares time and peak memory per diff. Run from the repository root: python3 scripts/benchmarks/diff_summary.py
+Exits with 1 on any difference."""
+import html
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.misc import ContentParser, class_searcher, escape_formatting
+from src.i18n import langs
+
+
+class LegacyContentParser(HTMLParser):
+	"""ContentParser as it was before summarize()"""
+	current_tag = ""
+	last_ins = None
+	last_del = None
+	empty = False
+	small_prev_ins = ""
+	small_prev_del = ""
+
+	def __init__(self, lang):
+		super().__init__()
+		self.more = langs[lang]["misc"].gettext("\n__And more__")
+		self.ins_length = len(self.more)
+		self.del_length = len(self.more)
+
+	def handle_starttag(self, tagname, attribs):
+		classes = class_searcher(attribs).split(' ')
+		if tagname == "ins" or tagname == "del":
+			self.current_tag = tagname
+		if tagname == "td" and "diff-addedline" in classes and self.ins_length <= 1000:
+			self.current_tag = "tda"
+			self.last_ins = ""
+		if tagname == "td" and "diff-deletedline" in classes and self.del_length <= 1000:
+			self.current_tag = "tdd"
+			self.last_del = ""
+		if tagname == "td" and "diff-empty" in classes:
+			self.empty = True
+
+	def handle_data(self, data):
+		data = escape_formatting(data)
+		if self.current_tag == "ins" and self.ins_length <= 1000:
+			self.ins_length += len("**" + data + "**")
+			if self.ins_length <= 1000:
+				self.last_ins = self.last_ins + "**" + data + "**"
+		if self.current_tag == "del" and self.del_length <= 1000:
+			self.del_length += len("~~" + data + "~~")
+			if self.del_length <= 1000:
+				self.last_del = self.last_del + "~~" + data + "~~"
+		if self.current_tag == "tda" and self.ins_length <= 1000:
+			self.ins_length += len(data)
+			if self.ins_length <= 1000:
+				self.last_ins = self.last_ins + data
+		if self.current_tag == "tdd" and self.del_length <= 1000:
+			self.del_length += len(data)
+			if self.del_length <= 1000:
+				self.last_del = self.last_del + data
+
+	def handle_endtag(self, tagname):
+		self.current_tag = ""
+		if tagname == "ins":
+			self.current_tag = "tda"
+		elif tagname == "del":
+			self.current_tag = "tdd"
+		elif tagname == "tr":
+			if self.last_ins is not None:
+				self.ins_length += 1
+				if self.empty and not self.last_ins.isspace() and "**" not in self.last_ins:
+					self.ins_length += 4
+					self.last_ins = "**" + self.last_ins + "**"
+				self.small_prev_ins = self.small_prev_ins + "\n" + self.last_ins
+				if self.ins_length > 1000:
+					self.small_prev_ins = self.small_prev_ins + self.more
+				self.last_ins = None
+			if self.last_del is not None:
+				self.del_length += 1
+				if self.empty and not self.last_del.isspace() and "~~" not in self.last_del:
+					self.del_length += 4
+					self.last_del = "~~" + self.last_del + "~~"
+				self.small_prev_del = self.small_prev_del + "\n" + self.last_del
+				if self.del_length > 1000:
+					self.small_prev_del = self.small_prev_del + self.more
+				self.last_del = None
+			self.empty = False
+
+
+def make_diff(rows: int, kind: str, seed: int) -> str:
+	"""Compare API diff HTML of given size, kind is "new" (page creation), "rewrite" or "small" (a few changed rows
+	at the end of an otherwise unchanged context)"""
+	rng = random.Random(seed)
+	words = ["lorem", "ipsum", "[[link|text]]", "{{template}}", "a<b", "R&D", "''italic''", "*", "_", "|", "‎", "   "]
+	line = lambda: html.escape(" ".join(rng.choice(words) for _ in range(rng.randint(0, 30))))
+	parts = ['<tr><td colspan="2" class="diff-lineno">Line 1:</td>\n<td colspan="2" class="diff-lineno">Line 1:</td></tr>\n']
+	for number in range(rows):
+		if kind == "new":
+			parts.append('<tr><td colspan="2" class="diff-empty diff-side-deleted"></td><td class="diff-marker" data-marker="+"></td>'
+			             '<td class="diff-addedline diff-side-added"><div>{}</div></td></tr>\n'.format(line()))
+		elif kind == "rewrite" or number > rows - 5:
+			parts.append('<tr><td class="diff-marker" data-marker="−"></td><td class="diff-deletedline diff-side-deleted"><div>{} <del class="diffchange diffchange-inline">{}</del></div></td>'
+			             '<td class="diff-marker" data-marker="+"></td><td class="diff-addedline diff-side-added"><div>{} <ins class="diffchange diffchange-inline">{}</ins></div></td></tr>\n'.format(line(), line(), line(), line()))
+		else:
+			context = line()
+			parts.append('<tr><td class="diff-marker"></td><td class="diff-context diff-side-deleted"><div>{0}</div></td>'
+			             '<td class="diff-marker"></td><td class="diff-context diff-side-added"><div>{0}</div></td></tr>\n'.format(context))
+	return "".join(parts)
+
+
+def legacy(diff: str, lang: str) -> tuple:
+	parser = LegacyContentParser(lang)
+	parser.feed(diff)
+	return parser.small_prev_ins, parser.small_prev_del
+
+
+def current(diff: str, lang: str) -> tuple:
+	parser = ContentParser(lang)
+	parser.summarize(diff)
+	return parser.small_prev_ins, parser.small_prev_del
+
+
+def measure(name, function, number=5):
+	tracemalloc.start()
+	function()
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	seconds = min(timeit.repeat(function, number=number, repeat=3)) / number
+	print("  {:<28} {:>10.2f} ms {:>10.1f} KiB peak".format(name, seconds * 1000, peak / 1024))
+
+
+if __name__ == "__main__":
+	different = 0
+	for seed in range(300):
+		diff = make_diff(random.Random(seed).randint(0, 40), random.Random(seed).choice(("new", "rewrite", "small")), seed)
+		for lang in ("en", "pl"):
+			if legacy(diff, lang) != current(diff, lang):
+				different += 1
+				print("Different summary for seed {} in {}".format(seed, lang))
+	print("300 small diffs, {} different".format(different))
+	for rows, kind in ((50, "small"), (5000, "small"), (5000, "rewrite"), (20000, "new")):
+		diff = make_diff(rows, kind, 0)
+		if legacy(diff, "en") != current(diff, "en"):
+			different += 1
+			print("Different summary for {} {} rows".format(rows, kind))
+		print("{} rows, {}, {:.1f} KiB of HTML".format(rows, kind, len(diff) / 1024))
+		measure("feed (previous parser)", lambda: legacy(diff, "en"))
+		measure("summarize", lambda: current(diff, "en"))
+	sys.exit(1 if different else 0)
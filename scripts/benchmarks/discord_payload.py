@@ -0,0 +1,67 @@
+"""Compares serializing Discord messages the way send_to_discord_webhook used to (json.dumps of the webhook object for
+the request and again for handle_discord_http, on every webhook and retry) with the payload cached by DiscordMessage,
+for large stacked embeds. Run from the repository root: python3 scripts/benchmarks/discord_payload.py"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src import codec
+from src.discord import DiscordMessage, stack_message_list
+
+WEBHOOKS = 5  # targets of the same wiki, language and display mode share the message
+SENDS = WEBHOOKS + 2  # two of the requests are retried
+
+
+def make_embed(number: int) -> DiscordMessage:
+	message = DiscordMessage("embed", "edit", ["webhook/{}".format(hook) for hook in range(WEBHOOKS)], wiki="https://community.fandom.com/")
+	message.set_author("Some user ąęść {}".format(number), "https://community.fandom.com/wiki/User:Some_user", icon_url="https://static.example.com/avatar.png")
+	message["title"] = "Some page (with brackets) & more? (+{})".format(number)
+	message["url"] = "https://community.fandom.com/index.php?title=Some_page&curid=314&diff={}&oldid={}".format(number + 1, number)
+	message["description"] = "Fixed a typo in [Some page](<https://community.fandom.com/wiki/Some_page>) 日本語 " * 5
+	message.add_field("Removed", "~~" + "old text " * 15 + "~~", inline=True)
+	message.add_field("Added", "**" + "new text " * 15 + "**", inline=True)
+	message.add_field("Tags", "VisualEditor, Reverted")
+	message.set_footer("Changes to 3 categories")
+	message.finish_embed()
+	return message
+
+
+def stacked_messages(count: int) -> list:
+	return stack_message_list([make_embed(number) for number in range(count)])
+
+
+def previous(messages: list):
+	for message in messages:
+		for _ in range(SENDS):
+			json.dumps(message.webhook_object)  # request body
+			json.dumps(message.webhook_object)  # repr(data) for handle_discord_http
+
+
+def current(messages: list):
+	for message in messages:
+		for _ in range(SENDS):
+			message.payload()
+
+
+if __name__ == "__main__":
+	print("JSON library: {}, every message is sent {} times".format(codec.backend, SENDS))
+	compact = stack_message_list([DiscordMessage("compact", "edit", [], wiki=None, content="line {}".format(number)) for number in range(5)])
+	if json.loads(repr(compact[0]))["content"] != "📝 line 0\n📝 line 1\n📝 line 2\n📝 line 3\n📝 line 4":
+		sys.exit("Stacked compact message has wrong content: {}".format(repr(compact[0])))
+	for count in (10, 100, 1000):
+		messages = stacked_messages(count)
+		if any(json.loads(message.payload()) != json.loads(json.dumps(message.webhook_object)) for message in messages):
+			sys.exit("Cached payload differs from the webhook object")
+		size = sum(len(message.payload()) for message in messages)
+		print("{} embeds in {} stacked messages, {:.1f} KiB of JSON".format(count, len(messages), size / 1024))
+		for name, function in (("json.dumps on every send", previous), ("cached payload", current)):
+			def run():
+				fresh = stacked_messages(count)  # the first payload() of every message is part of the cost
+				start = timeit.default_timer()
+				function(fresh)
+				return timeit.default_timer() - start
+			seconds = min(run() for _ in range(5))
+			print("  {:<28} {:>10.3f} ms".format(name, seconds * 1000))
@@ -0,0 +1,94 @@
+"""Renders every change of fixtures/recentchanges.json in every language, display mode and with and without action
+buttons, to check that changes to the formatters don't change what is sent to Discord.
+Run from the repository root:
+	python3 scripts/benchmarks/formatter_output.py before.json   # save the output of the current code
+	python3 scripts/benchmarks/formatter_output.py after.json --compare before.json
+Exits with 1 if the output differs from the compared file."""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.i18n import langs
+from src.misc import RenderingContext
+from src.wiki import analyze_change, render_change
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+WIKI = "https://community.fandom.com/"
+BUTTONS = (None, "block|rollback|undo|delete|filerevert")
+DIFF = ('<tr><td colspan="2" class="diff-lineno">Line 1:</td><td colspan="2" class="diff-lineno">Line 1:</td></tr>'
+        '<tr><td class="diff-marker">−</td><td class="diff-deletedline"><div>Old <del class="diffchange diffchange-inline">text</del></div></td>'
+        '<td class="diff-marker">+</td><td class="diff-addedline"><div>New <ins class="diffchange diffchange-inline">text_with *markdown*</ins></div></td></tr>')
+
+
+class FixtureWiki:
+	"""Stands in for src.wiki.Wiki, only the rendering context is used by the formatters"""
+	def __init__(self):
+		namespaces = {"0": {"id": 0, "*": ""}, "2": {"id": 2, "*": "User"}, "4": {"id": 4, "*": "Project"}}
+		self.context = RenderingContext(WIKI, "/wiki/$1", namespaces, {"visualeditor": "VisualEditor", "hidden-tag": None})
+
+
+class FixtureEnrichment:
+	"""Stands in for src.enrichment.ScanEnrichment with canned API responses"""
+	async def diff(self, change: dict):
+		return DIFF
+
+	async def imageinfo(self, title: str):
+		return {"42": {"pageid": 42, "ns": 6, "title": title, "imageinfo": [
+			{"timestamp": "2021-06-01T12:00:00Z", "url": "https://static.example.com/new.png"},
+			{"timestamp": "2020-01-01T00:00:00Z", "url": "https://static.example.com/old.png", "archivename": "20200101000000!Example_image.png"}]}}
+
+	async def comment(self, comment_id):
+		return "Comment number {} with _markdown_".format(comment_id)
+
+
+def load_changes() -> list:
+	with open(os.path.join(FIXTURES, "recentchanges.json"), encoding="utf-8") as fixture:
+		return json.load(fixture)["recentchanges"]
+
+
+def targets():
+	for lang in sorted(langs):
+		for display in range(4):
+			for buttons in BUTTONS:
+				yield (lang, display, buttons), ["webhook"]
+
+
+async def render_all() -> dict:
+	wiki, enrichment = FixtureWiki(), FixtureEnrichment()
+	results = {}
+	for change in load_changes():
+		event = analyze_change(change, {}, wiki)
+		for target in targets():
+			random.seed(change["rcid"])  # colors of events without one in event_appearance are random
+			message = await render_change(event, wiki, target, enrichment)
+			key = "{} {} {} {} {}".format(change["rcid"], event.action, *target[0])
+			results[key] = None if message is None else [message.event_type, json.loads(repr(message))]
+	return results
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+	parser.add_argument("output", help="file to save rendered messages to")
+	parser.add_argument("--compare", help="file saved by an earlier run to compare the output with")
+	arguments = parser.parse_args()
+	logging.disable(logging.WARNING)  # unknown events in the fixtures are logged
+	time.time = lambda: 1622548800.0  # file previews have a cachebusting timestamp
+	results = asyncio.run(render_all())
+	with open(arguments.output, "w", encoding="utf-8") as output:
+		json.dump(results, output, indent="\t", ensure_ascii=False, sort_keys=True)
+	print("Rendered {} messages.".format(len(results)))
+	if arguments.compare:
+		with open(arguments.compare, encoding="utf-8") as compared_file:
+			compared = json.load(compared_file)
+		different = sorted(key for key in set(results) | set(compared) if results.get(key, "missing") != compared.get(key, "missing"))
+		for key in different[:50]:
+			print("Different output for {}:\n  before: {}\n  after:  {}".format(key, compared.get(key, "missing"), results.get(key, "missing")))
+		print("{} of {} messages differ.".format(len(different), len(results)))
+		sys.exit(1 if different else 0)
@@ -0,0 +1,139 @@
+"""Measures the formatters (compact_formatter, embed_formatter, feeds_compact_formatter and feeds_embed_formatter) on
+every change of fixtures/recentchanges.json and every post of fixtures/discussions.json, rendered for every language
+and display mode. Diffs, file information and profile comments go through ScanEnrichment with safe_request returning
+canned API responses, so the measured path is the one of a real scan without the network.
+Run from the repository root:
+	python3 scripts/benchmarks/formatters.py before.json
+	python3 scripts/benchmarks/formatters.py after.json --compare before.json
+Reports time (ns/op) and allocated memory (peak bytes/op, tracemalloc) per action and saves them as JSON."""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from formatter_output import DIFF, FIXTURES, WIKI, FixtureWiki, load_changes, targets
+from src.enrichment import ScanEnrichment, enrichment_cache
+from src.wiki import Wiki, analyze_change, essential_feeds, render_change
+
+API_RESPONSES = {
+	"action=compare": {"compare": {"*": DIFF}},
+	"prop=imageinfo": {"batchcomplete": "", "query": {"pages": {"42": {"pageid": 42, "ns": 6, "title": "File:Example image.png", "imageinfo": [
+		{"timestamp": "2021-06-01T12:00:00Z", "url": "https://static.example.com/new.png"},
+		{"timestamp": "2020-01-01T00:00:00Z", "url": "https://static.example.com/old.png", "archivename": "20200101000000!Example_image.png"}]}}}},
+	"action=comment": {"text": "Comment with _markdown_ " * 10},
+}
+
+
+class StubbedWiki(FixtureWiki):
+	"""FixtureWiki answering API requests of the enrichment with canned responses"""
+	pull_comment = Wiki.pull_comment
+
+	async def safe_request(self, url, ratelimiter, *keys):
+		for marker, response in API_RESPONSES.items():
+			if marker in url:
+				for key in keys:
+					response = response[key]
+				return response
+		raise ValueError("No canned response for {}".format(url))
+
+
+def load_posts() -> tuple:
+	with open(os.path.join(FIXTURES, "discussions.json"), encoding="utf-8") as fixture:
+		discussions = json.load(fixture)
+	return discussions["posts"], discussions["articleNames"]
+
+
+def post_action(post: dict) -> str:
+	container = post["_embedded"]["thread"][0]["containerType"]
+	if post["isReply"]:
+		return "discussion/{}/reply".format(container)
+	return "discussion/{}/{}".format(container, post.get("funnel") if container == "FORUM" else "post")
+
+
+def operations() -> dict:
+	"""Returns {(formatter, action): [coroutine functions rendering a single message]}"""
+	wiki = StubbedWiki()
+	ops = defaultdict(list)
+	for change in load_changes():
+		event = analyze_change(change, {}, wiki)
+		for target in targets():
+			if target[0][2] is not None:
+				continue  # action buttons are covered by formatter_output.py, they don't change the cost much
+			formatter = "embed_formatter" if target[0][1] > 0 else "compact_formatter"
+			# a new ScanEnrichment every time, otherwise everything after the first run would be a memoized lookup
+			ops[(formatter, event.action)].append(lambda event=event, target=target: render_change(event, wiki, target, ScanEnrichment(WIKI, wiki, None)))
+	posts, article_names = load_posts()
+	db_wiki = {"wiki": WIKI}
+	for post in posts:
+		for target in targets():
+			if target[0][2] is not None:
+				continue
+			formatter = "feeds_embed_formatter" if target[0][1] > 0 else "feeds_compact_formatter"
+			ops[(formatter, post_action(post))].append(lambda post=post, target=target: essential_feeds(post, article_names, db_wiki, target))
+	return ops
+
+
+async def measure(functions: list, rounds: int) -> dict:
+	for function in functions:  # warm up caches of gettext, regexes and the like
+		await function()
+	start = time.perf_counter_ns()
+	for _ in range(rounds):
+		for function in functions:
+			await function()
+	elapsed = time.perf_counter_ns() - start
+	tracemalloc.start()
+	peak = 0
+	for function in functions:
+		tracemalloc.reset_peak()
+		before = tracemalloc.get_traced_memory()[0]
+		await function()
+		peak += tracemalloc.get_traced_memory()[1] - before
+	tracemalloc.stop()
+	ops = len(functions)
+	return {"ops": ops * rounds, "ns_per_op": elapsed // (ops * rounds), "peak_bytes_per_op": peak // ops}
+
+
+async def run(rounds: int) -> dict:
+	results = {}
+	for (formatter, action), functions in sorted(operations().items()):
+		results["{} {}".format(formatter, action)] = await measure(functions, rounds)
+	return results
+
+
+def compare(results: dict, compared: dict):
+	print("{:<70} {:>12} {:>12} {:>8} {:>10}".format("formatter action", "ns/op before", "ns/op after", "change", "bytes"))
+	for key in sorted(set(results) | set(compared)):
+		if key not in results or key not in compared:
+			print("{:<70} only in {}".format(key, "the compared file" if key in compared else "this run"))
+			continue
+		before, after = compared[key], results[key]
+		print("{:<70} {:>12} {:>12} {:>+7.1f}% {:>+10}".format(key, before["ns_per_op"], after["ns_per_op"],
+		      (after["ns_per_op"] / before["ns_per_op"] - 1) * 100, after["peak_bytes_per_op"] - before["peak_bytes_per_op"]))
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+	parser.add_argument("output", help="file to save the results to")
+	parser.add_argument("--compare", help="file saved by an earlier run to compare the results with")
+	parser.add_argument("--rounds", type=int, default=5, help="how many times every message is rendered, default 5")
+	arguments = parser.parse_args()
+	logging.disable(logging.WARNING)  # unknown events in the fixtures are logged
+	enrichment_cache.ttl = 0
+	results = asyncio.run(run(arguments.rounds))
+	with open(arguments.output, "w", encoding="utf-8") as output:
+		json.dump({"python": platform.python_version(), "rounds": arguments.rounds, "results": results}, output, indent="\t", sort_keys=True)
+	if arguments.compare:
+		with open(arguments.compare, encoding="utf-8") as compared_file:
+			compare(results, json.load(compared_file)["results"])
+	else:
+		print("{:<70} {:>12} {:>12}".format("formatter action", "ns/op", "bytes/op"))
+		for key, result in sorted(results.items()):
+			print("{:<70} {:>12} {:>12}".format(key, result["ns_per_op"], result["peak_bytes_per_op"]))
@@ -0,0 +1,83 @@
+"""Checks that ScanEnrichment.imageinfo_batch takes pages out of a multi-title imageinfo query only when they are
+complete and requests the others one by one, using canned API responses. Run from the repository root:
+	python3 scripts/benchmarks/imageinfo_batching.py
+Exits with 1 on any failed check."""
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.enrichment import ScanEnrichment, enrichment_cache
+
+WIKI = "https://community.fandom.com/"
+NEW, OLD = "2021-06-01T12:00:00Z", "2020-01-01T00:00:00Z"
+
+
+def revision(timestamp: str, title: str) -> dict:
+	return {"timestamp": timestamp, "url": "https://static.example.com/{}/{}".format(title, timestamp), "archivename": "{}!{}".format(timestamp, title)}
+
+
+def page(page_id: int, title: str, *timestamps: str) -> dict:
+	return {"pageid": page_id, "ns": 6, "title": title, "imageinfo": [revision(timestamp, title) for timestamp in timestamps]}
+
+
+class CannedWiki:
+	"""Answers the batch request with given response and single title requests with complete pages"""
+	def __init__(self, batch_response: dict):
+		self.batch_response = batch_response
+		self.single_requests = []
+
+	async def safe_request(self, url, ratelimiter, *keys):
+		if not keys:  # the batch keeps the whole response
+			response = self.batch_response
+		else:
+			title = url.split("&titles=")[1].split("&")[0]
+			self.single_requests.append(title)
+			response = {"query": {"pages": {"9": page(9, title, NEW, OLD)}}}
+		for key in keys:
+			response = response[key]
+		return response
+
+
+async def imageinfo(batch_response: dict, titles: dict) -> tuple:
+	wiki = CannedWiki(batch_response)
+	enrichment = ScanEnrichment(WIKI, wiki, None)
+	await enrichment.imageinfo_batch(titles)
+	return {title: await enrichment.imageinfo(title) for title in titles}, wiki.single_requests
+
+
+def check(name: str, condition: bool) -> int:
+	print("{:<85} {}".format(name, "ok" if condition else "FAILED"))
+	return 0 if condition else 1
+
+
+async def main() -> int:
+	titles = {"File:Complete.png": {NEW}, "File:Empty.png": {NEW}, "File:Overwritten.png": {NEW}, "File:Missing.png": {NEW}}
+	pages = {"1": page(1, "File:Complete.png", NEW, OLD), "2": {"pageid": 2, "ns": 6, "title": "File:Empty.png"},
+	         "3": page(3, "File:Overwritten.png", NEW), "-1": {"ns": 6, "title": "File:Missing.png", "missing": ""}}
+	failed = 0
+
+	results, single = await imageinfo({"continue": {"iicontinue": "Overwritten.png|20200101000000", "continue": "||"}, "query": {"pages": pages}}, titles)
+	failed += check("truncated batch: complete page is taken from the batch", "File:Complete.png" not in single and "1" in results["File:Complete.png"])
+	failed += check("truncated batch: page without imageinfo is requested again", "File:Empty.png" in single and
+	                results["File:Empty.png"]["9"]["imageinfo"][0]["timestamp"] == NEW)
+	failed += check("truncated batch: page without the previous version is requested again", "File:Overwritten.png" in single and
+	                len(results["File:Overwritten.png"]["9"]["imageinfo"]) == 2)
+	failed += check("truncated batch: missing file is not requested again", "File:Missing.png" not in single and "-1" in results["File:Missing.png"])
+
+	results, single = await imageinfo({"batchcomplete": "", "query": {"pages": pages}}, titles)
+	failed += check("complete batch: only the page with fewer revisions than timestamps is requested again", single == ["File:Empty.png"])
+	failed += check("complete batch: file with a single version is taken from the batch", "3" in results["File:Overwritten.png"])
+
+	results, single = await imageinfo({"batchcomplete": "", "query": {"pages": {"1": page(1, "File:Complete.png", NEW)}}},
+	                                  {"File:Complete.png": {NEW, OLD}})
+	failed += check("page with fewer revisions than requested timestamps is requested again", single == ["File:Complete.png"])
+	return failed
+
+
+if __name__ == "__main__":
+	logging.disable(logging.WARNING)
+	enrichment_cache.ttl = 0
+	sys.exit(1 if asyncio.run(main()) else 0)
@@ -0,0 +1,139 @@
+"""Checks that src.misc.parse_link gives the same output as the previous HTMLParser singleton and compares their speed.
+Run from the repository root: python3 scripts/benchmarks/link_parsing.py [file]
+
+The file, if given, is either a recentchanges API response or a text file with one JSON encoded parsedcomment per line.
+Without it a generated corpus of comments shaped like the ones MediaWiki makes is used. Exits with 1 on any difference."""
+import base64
+import json
+import os
+import random
+import re
+import sys
+import timeit
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.misc import parse_link
+
+DOMAIN = "https://community.fandom.com"
+
+
+def legacy_escape_formatting(data: str) -> str:
+	return re.sub(r"([`_*~:<>{}@/|#\-\.\\\[\]\(\)])", "\\\\\\1", data, 0) if data is not None else ""
+
+
+class LegacyLinkParser(HTMLParser):
+	"""LinkParser as it was before parse_link stopped using it"""
+	new_string = ""
+	recent_href = ""
+	WIKI_JUST_DOMAIN = ""
+
+	def handle_starttag(self, tag, attrs):
+		for attr in attrs:
+			if attr[0] == 'href':
+				self.recent_href = attr[1]
+				if self.recent_href.startswith("//"):
+					self.recent_href = "https:{rest}".format(rest=self.recent_href)
+				elif not self.recent_href.startswith("http"):
+					self.recent_href = self.WIKI_JUST_DOMAIN + self.recent_href
+				self.recent_href = self.recent_href.replace(")", "\\)")
+			elif attr[0] == 'data-uncrawlable-url':
+				self.recent_href = attr[1].encode('ascii')
+				self.recent_href = base64.b64decode(self.recent_href)
+				self.recent_href = self.WIKI_JUST_DOMAIN + self.recent_href.decode('ascii')
+
+	def handle_data(self, data):
+		if self.recent_href:
+			self.new_string = self.new_string + "[{}](<{}>)".format(legacy_escape_formatting(data), self.recent_href)
+			self.recent_href = ""
+		else:
+			self.new_string = self.new_string + legacy_escape_formatting(data)
+
+	def handle_comment(self, data):
+		self.new_string = self.new_string + legacy_escape_formatting(data)
+
+
+legacy_parser = LegacyLinkParser()
+
+
+def legacy_parse_link(domain: str, to_parse: str) -> str:
+	legacy_parser.WIKI_JUST_DOMAIN = domain
+	legacy_parser.new_string = ""
+	legacy_parser.feed(to_parse)
+	legacy_parser.recent_href = ""
+	return legacy_parser.new_string
+
+
+def legacy_reference(domain: str, to_parse: str) -> str:
+	"""Output of the legacy parser for a single text. The shared instance was never closed, so text ending with
+	something resembling an entity ("AT&T") stayed in its buffer and came out in front of the next comment; that part
+	of the behaviour is not kept."""
+	parser = LegacyLinkParser()
+	parser.WIKI_JUST_DOMAIN = domain
+	parser.feed(to_parse)
+	parser.close()
+	return parser.new_string
+
+
+def generated_corpus(size: int) -> list:
+	rng = random.Random(1)
+	words = ["Fixed", "typo", "in", "infobox", "AT&amp;T", "&quot;quoted&quot;", "it&#039;s", "1.5", "(see", "talk)", "#1",
+	         "a_b", "*bold*", "~~", "x<y", "`code`", "|", "{template}", "@user", "C:\\path", "[note]", "ąęść", "日本語"]
+	pieces = [
+		lambda: " ".join(rng.choice(words) for _ in range(rng.randint(1, 8))),
+		lambda: '<span dir="auto"><span class="autocomment"><a href="/wiki/Page#Section" title="Page">→‎Section</a>: </span></span>',
+		lambda: '<a href="/wiki/Some_page_(disambiguation)" title="Some page (disambiguation)">Some page</a>',
+		lambda: '<a href="/wiki/Red?action=edit&amp;redlink=1" class="new" title="Red (page does not exist)">Red</a>',
+		lambda: '<a rel="nofollow" class="external text" href="https://example.com/a_b?c=1&amp;d=(2)">example</a>',
+		lambda: '<a class="external free" href="//example.org/x">//example.org/x</a>',
+		lambda: '<a data-uncrawlable-url="{}">uncrawlable</a>'.format(base64.b64encode(b"/wiki/Special:Log?page=X").decode("ascii")),
+		lambda: "<a href='/wiki/Single_quotes'>single</a>",
+		lambda: '<a href="/wiki/Empty"></a>',
+		lambda: "<br/>",
+		lambda: "<b>bold</b>",
+	]
+	odd = ["a < b", "<!-- comment -->text", "unterminated <a href=\"/x\"", "AT&T", "AT&T <b>x</b>", "&amp", "<script>x<b></script>",
+	       "</a b>", "<a href=/unquoted>u</a>", "<a href>empty</a>", "&#x41;&#65;&lt;&gt;&amp;&nbsp;", ""]
+	corpus = list(odd)
+	for _ in range(size):
+		corpus.append("".join(rng.choice(pieces)() for _ in range(rng.randint(1, 6))))
+	return corpus
+
+
+def load_corpus(path: str) -> list:
+	with open(path, encoding="utf-8") as corpus_file:
+		content = corpus_file.read()
+	try:
+		response = json.loads(content)
+	except ValueError:
+		return [json.loads(line) for line in content.splitlines() if line.strip()]
+	return [change["parsedcomment"] for change in response["query"]["recentchanges"] if "parsedcomment" in change]
+
+
+def differences(corpus: list) -> int:
+	different = 0
+	for comment in corpus:
+		try:
+			expected = legacy_reference(DOMAIN, comment)
+		except Exception as error:  # the legacy parser chokes on some inputs, the new one should raise the same way
+			expected = type(error)
+		try:
+			result = parse_link(DOMAIN, comment)
+		except Exception as error:
+			result = type(error)
+		if result != expected:
+			different += 1
+			print("Different output for {!r}:\n  legacy: {!r}\n  new:    {!r}".format(comment, expected, result))
+	return different
+
+
+if __name__ == "__main__":
+	corpus = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else generated_corpus(20000)
+	different = differences(corpus)
+	print("{} comments, {} different".format(len(corpus), different))
+	valid = [comment for comment in corpus if not isinstance(comment, str) or "<a href>" not in comment]
+	for name, function in (("HTMLParser singleton", legacy_parse_link), ("parse_link", parse_link)):
+		seconds = min(timeit.repeat(lambda: [function(DOMAIN, comment) for comment in valid], number=1, repeat=5))
+		print("{:<25} {:>10.2f} µs per comment".format(name, seconds / len(valid) * 1000000))
+	sys.exit(1 if different else 0)
@@ -0,0 +1,48 @@
+"""Checks that PollScheduler never hands out a wiki which is still being polled, also when the wiki is removed and
+added back during its poll like subscription changes do. Run from the repository root:
+	python3 scripts/benchmarks/poll_scheduler.py
+Exits with 1 on any failed check."""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.scheduler import PollScheduler
+
+WIKI = "https://community.fandom.com/"
+
+
+def check(name: str, condition: bool) -> int:
+	print("{:<70} {}".format(name, "ok" if condition else "FAILED"))
+	return 0 if condition else 1
+
+
+async def main() -> int:
+	failed = 0
+	schedule = PollScheduler()
+	schedule.add(WIKI)
+	failed += check("due wiki is taken", await schedule.take_next(max_wait=0.1) == WIKI)
+	schedule.remove(WIKI)
+	schedule.add(WIKI)
+	failed += check("wiki added back during its poll is a member of the schedule", WIKI in schedule and len(schedule) == 1)
+	failed += check("wiki added back during its poll is not taken again", await schedule.take_next(max_wait=0.1) is None)
+	schedule.reschedule(WIKI, 0.0)
+	failed += check("wiki added back during its poll is taken after the poll", await schedule.take_next(max_wait=0.1) == WIKI)
+
+	schedule.remove(WIKI)
+	schedule.reschedule(WIKI, 0.0)
+	failed += check("wiki removed during its poll stays removed", WIKI not in schedule and await schedule.take_next(max_wait=0.1) is None)
+	schedule.add(WIKI)
+	failed += check("wiki added after the poll of a removed one is taken", await schedule.take_next(max_wait=0.1) == WIKI)
+
+	schedule.add(WIKI)
+	failed += check("adding a wiki being polled changes nothing", await schedule.take_next(max_wait=0.1) is None)
+	schedule.poke(WIKI)
+	schedule.reschedule(WIKI, 60.0)
+	failed += check("wiki poked during its poll is due right after it", await schedule.take_next(max_wait=0.1) == WIKI)
+	return failed
+
+
+if __name__ == "__main__":
+	sys.exit(1 if asyncio.run(main()) else 0)
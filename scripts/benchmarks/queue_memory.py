@@ -0,0 +1,59 @@
+"""Measures memory taken by messages waiting in the message queue, as DiscordMessage objects (what the queue held before)
+and as the QueuedMessage made by DiscordMessage.freeze(). Messages are rendered from fixtures/recentchanges.json in
+compact and embed mode and stacked as the bot does. Run from the repository root: python3 scripts/benchmarks/queue_memory.py"""
+import asyncio
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from formatter_output import FixtureEnrichment, FixtureWiki, load_changes
+from src.discord import stack_message_list
+from src.wiki import analyze_change, render_change
+
+COPIES = 20  # how many times the fixture is rendered to fill the queue
+
+
+async def render(display: int) -> list:
+	wiki, enrichment = FixtureWiki(), FixtureEnrichment()
+	target = (("en", display, None), ["123456789012345678/" + "x" * 68])
+	messages = []
+	for _ in range(COPIES):
+		rendered = []
+		for change in load_changes():
+			message = await render_change(analyze_change(change, {}, wiki), wiki, target, enrichment)
+			if message is not None:
+				rendered.append(message)
+		messages.extend(stack_message_list(rendered))
+	return messages
+
+
+def queued_size(display: int, keep) -> tuple:
+	"""Returns (messages, bytes allocated by the queue) for messages of given display mode turned into queue entries by keep"""
+	loop = asyncio.new_event_loop()
+	loop.run_until_complete(render(display))  # caches of translations and such shouldn't count
+	tracemalloc.start()
+	queue = [keep(message) for message in loop.run_until_complete(render(display))]
+	gc.collect()
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	loop.close()
+	return len(queue), size
+
+
+def sent_once(message):
+	message.payload()  # what a message which failed to be delivered carries
+	return message
+
+
+if __name__ == "__main__":
+	logging.disable(logging.WARNING)
+	print("{:<10} {:<40} {:>10} {:>14}".format("mode", "queued as", "messages", "bytes/message"))
+	for display, mode in ((0, "compact"), (1, "embed"), (3, "embed (display 3)")):
+		for name, keep in (("DiscordMessage", lambda message: message), ("DiscordMessage after a send attempt", sent_once),
+		                   ("QueuedMessage", lambda message: message.freeze())):
+			count, size = queued_size(display, keep)
+			print("{:<10} {:<40} {:>10} {:>14.0f}".format(mode, name, count, size / count))
@@ -0,0 +1,102 @@
+"""Checks that the first scan of a wiki after a restart, when the change rate isn't measured yet, catches up with
+a backlog of more than 100 changes since the saved rcid within max_rc_pages pages. Uses Wiki.rc_limit and the Wiki
+requests against a canned recentchanges API and pages the way scan_group does without last_timestamp (newest first).
+Run from the repository root: python3 scripts/benchmarks/rc_catch_up.py
+Exits with 1 on any failed check."""
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.config import settings
+from src.misc import parse_recent_changes
+from src.wiki import Wiki, read_response
+
+WIKI = "https://community.fandom.com/"
+NEWEST_RCID = 5000
+
+
+class CannedResponse:
+	def __init__(self, body: str):
+		self.body = body.encode("utf-8")
+		self.status = 200
+		self.content_type = "application/json"
+		self.content_length = len(self.body)
+		self.content = self
+
+	async def iter_chunked(self, size: int):
+		for start in range(0, len(self.body), size):
+			yield self.body[start:start + size]
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *args):
+		return False
+
+
+class CannedSession:
+	"""Serves recent changes of rcids 1 to NEWEST_RCID newest first, rccontinue is the rcid to continue from"""
+	def __init__(self):
+		self.requests = []
+
+	async def get(self, url: str, params: dict):
+		self.requests.append(params)
+		limit = int(params["rclimit"])
+		start = int(params.get("rccontinue", NEWEST_RCID))
+		rcids = range(start, max(start - limit, 0), -1)
+		response = {"batchcomplete": "", "query": {"recentchanges": [
+			{"type": "edit", "ns": 0, "title": "Page {}".format(rcid), "rcid": rcid, "revid": rcid, "old_revid": rcid - 1,
+			 "timestamp": "2021-01-01T{:02d}:{:02d}:00Z".format(rcid // 60 % 24, rcid % 60)} for rcid in rcids]}}
+		if start - limit > 0:
+			response["continue"] = {"rccontinue": str(start - limit), "continue": "-||"}
+		return CannedResponse(json.dumps(response))
+
+
+class NoLimits:
+	async def acquire(self, url: str):
+		pass
+
+
+async def catch_up(backlog: int) -> tuple:
+	"""Returns (rcids of new changes found by the first scan, amount of requests) for a wiki saved backlog changes ago"""
+	wiki = Wiki(rc_active=NEWEST_RCID - backlog)
+	session, rate_limiter = CannedSession(), NoLimits()
+	amount = wiki.rc_limit()
+	response = await wiki.fetch_wiki(False, WIKI, session, rate_limiter, amount=amount, metadata=False)
+	async with response:
+		first_page, skipped, _ = parse_recent_changes(await read_response(response), wiki.rc_active)
+	recent_changes = first_page["query"]["recentchanges"]
+	rc_continue = first_page.get("continue", {}).get("rccontinue")
+	pages = 1
+	while rc_continue and pages < settings.get("max_rc_pages", 5) and not skipped:
+		next_page, skipped, _ = await wiki.fetch_continuation(WIKI, session, rate_limiter, amount, rc_continue)
+		recent_changes.extend(next_page["query"]["recentchanges"])
+		rc_continue = next_page.get("continue", {}).get("rccontinue")
+		pages += 1
+	return sorted(change["rcid"] for change in recent_changes), len(session.requests)
+
+
+def check(name: str, condition: bool) -> int:
+	print("{:<70} {}".format(name, "ok" if condition else "FAILED"))
+	return 0 if condition else 1
+
+
+async def main() -> int:
+	failed = 0
+	for backlog in (15, 150, 1200):
+		rcids, requests = await catch_up(backlog)
+		failed += check("backlog of {} changes: all of them found".format(backlog), rcids == list(range(NEWEST_RCID - backlog + 1, NEWEST_RCID + 1)))
+		failed += check("backlog of {} changes: {} request(s)".format(backlog, requests), requests <= 1 + backlog // 500)
+	rcids, requests = await catch_up(3000)  # more than max_rc_pages of 500 changes, scan_group warns about the rest
+	failed += check("backlog of 3000 changes: newest {} of them found".format(len(rcids)), len(rcids) == 500 * settings.get("max_rc_pages", 5)
+	                and rcids[-1] == NEWEST_RCID)
+	new_wiki = Wiki(rc_active=0)
+	failed += check("wiki without saved rcid asks for 20 changes", new_wiki.rc_limit() == 20)
+	return failed
+
+
+if __name__ == "__main__":
+	sys.exit(1 if asyncio.run(main()) else 0)
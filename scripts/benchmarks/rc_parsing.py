@@ -0,0 +1,43 @@
+"""Compares decoding recentchanges API responses with json.loads (what aiohttp's .json() does) against
+src.misc.parse_recent_changes. Run from the repository root: python3 scripts/benchmarks/rc_parsing.py"""
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.misc import parse_recent_changes
+
+
+def make_fixture(changes: int, tags: int) -> str:
+	recent_changes = []
+	for rcid in range(1, changes + 1):
+		recent_changes.append({"type": "edit", "ns": 0, "title": "Page number {}".format(rcid), "pageid": rcid, "revid": rcid * 2,
+		                       "old_revid": rcid * 2 - 1, "rcid": rcid, "user": "Some user", "userid": 1234, "oldlen": 18000,
+		                       "newlen": 18020, "timestamp": "2021-01-01T{:02d}:{:02d}:{:02d}Z".format(rcid // 3600 % 24, rcid // 60 % 60, rcid % 60),
+		                       "parsedcomment": "Fixed a typo in <a href=\"/wiki/Some_page\" title=\"Some page\">Some page</a> " * 3,
+		                       "redirect": "", "tags": ["mw-reverted", "visualeditor"], "logparams": []})
+	response = {"batchcomplete": "", "continue": {"rccontinue": "20210101000000|1", "continue": "-||"},
+	            "query": {"recentchanges": recent_changes,
+	                      "tags": [{"name": "tag-{}".format(num), "displayname": "<a href=\"/wiki/Tag\">Tag {}</a>".format(num)} for num in range(tags)]}}
+	return json.dumps(response, separators=(",", ":"))
+
+
+def measure(name, function, number=20):
+	tracemalloc.start()
+	function()
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	seconds = min(timeit.repeat(function, number=number, repeat=5)) / number
+	print("{:<40} {:>10.3f} ms {:>10.1f} KiB peak".format(name, seconds * 1000, peak / 1024))
+
+
+if __name__ == "__main__":
+	for changes, tags in ((20, 50), (450, 400), (2000, 400)):
+		body = make_fixture(changes, tags)
+		print("{} changes, {} tags, {:.1f} KiB body".format(changes, tags, len(body) / 1024))
+		measure("json.loads", lambda: json.loads(body))
+		measure("parse_recent_changes (all new)", lambda: parse_recent_changes(body, 0))
+		measure("parse_recent_changes (10 new)", lambda: parse_recent_changes(body, changes - 10))
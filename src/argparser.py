@@ -2,4 +2,5 @@ import argparse
 
 parser = argparse.ArgumentParser(description="Starts the bot to retrieve wiki recent changes.")
 parser.add_argument("-d", "--debug", action='store_true', help="Starts debugging session, will cause exceptions to return immediately")
+parser.add_argument("--migrate", action='store_true', help="Creates or updates the database schema, moving data from the old rcgcdw table, and exits")
 command_line_args = parser.parse_args()
@@ -1,26 +1,36 @@
 import sys
 
 import aiohttp
+import asyncpg
 import asyncio
 import logging.config
 import signal
 import traceback
 import nest_asyncio
 import time
-from collections import defaultdict, namedtuple
-from typing import Generator
+from collections import defaultdict
+from typing import AsyncGenerator
 
 from contextlib import asynccontextmanager
 from src.argparser import command_line_args
 from src.config import settings
 from src.database import db
+from src import storage, codec
 from src.exceptions import *
-from src.misc import get_paths, get_domain
+from src.misc import get_domain, parse_recent_changes
 from src.msgqueue import messagequeue, send_to_discord
 from src.queue_handler import DBHandler
-from src.wiki import Wiki, process_cats, process_mwmsgs, essential_info, essential_feeds
+from src.journal import journal
+from src.wiki import Wiki, process_cats, process_mwmsgs, analyze_change, render_change, essential_feeds, read_response
 from src.discord import DiscordMessage, generic_msg_sender_exception_logger, stack_message_list
-from src.wiki_ratelimiter import RateLimiter
+from src.wiki_ratelimiter import group_rate_limiter
+from src.session_pool import session_pool
+from src.enrichment import ScanEnrichment, enrichment_cache
+from src.render_pool import render_pool
+from src.scheduler import PollScheduler
+from src.sharding import shard_leases
+from src.subscriptions import subscription_feed
+from src.targets import target_index
 from src.irc_feed import AioIRCCat
 
 
@@ -42,33 +52,51 @@ main_tasks: dict = {}
 # Reasons for this: 1. we require amount of wikis to calculate the cooldown between requests
 # 2. Easier to code
 
-async def populate_allwikis():
-	async with db.pool().acquire() as connection:
-		async with connection.transaction():
-			async for db_wiki in connection.cursor('SELECT DISTINCT wiki, rcid FROM rcgcdw'):
-				all_wikis[db_wiki["wiki"]] = Wiki()  # populate all_wikis
-				all_wikis[db_wiki["wiki"]].rc_active = db_wiki["rcid"]
-
-queue_limit = settings.get("queue_limit", 30)
-QueuedWiki = namedtuple("QueuedWiki", ['url', 'amount'])
-
-class LimitedList(list):
-	def __init__(self, *args):
-		list.__init__(self, *args)
-
-	def append(self, obj: QueuedWiki, forced: bool = False) -> None:
-		if len(self) < queue_limit or forced:
-			self.insert(len(self), obj)
-			return
-		raise ListFull
-
+async def populate_allwikis() -> list:
+	"""Creates Wiki objects of every wiki in the database, returns the database rows"""
+	wiki_states = await storage.wiki_states()
+	for db_wiki in wiki_states:
+		all_wikis[db_wiki["wiki"]] = Wiki()  # populate all_wikis
+		all_wikis[db_wiki["wiki"]].rc_active = db_wiki["rcid"] if db_wiki["rc"] else -1
+		all_wikis[db_wiki["wiki"]].fail_times = db_wiki["fail_times"]
+	return wiki_states
+
+async def replay_journal(wiki_states: list):
+	"""Restores progress from the local checkpoint journal, which might have not reached the database before the last
+	shutdown, and empties the journal once it's saved.
+
+	Only checkpoints newer than the database are replayed. Wikis whose feed was disabled or reset (NULL, start from
+	the newest change) since the checkpoint was written keep the database state."""
+	if not journal.enabled:
+		return
+	saved = {}  # (wiki, feeds): checkpoint in the database
+	for db_wiki in wiki_states:
+		if db_wiki["rc"] and db_wiki["rcid"] is not None:
+			saved[(db_wiki["wiki"], False)] = db_wiki["rcid"]
+		if db_wiki["feeds"] and db_wiki["postid"] not in (None, "-1"):
+			saved[(db_wiki["wiki"], True)] = db_wiki["postid"]
+	replayed = 0
+	for wiki_url, feeds, value in journal.replay():
+		key = (wiki_url, bool(feeds))
+		if key not in saved or int(value) <= int(saved[key]):
+			continue
+		replayed += 1
+		DBHandler.add(wiki_url, value, True if feeds else None)
+		if not feeds and value > all_wikis[wiki_url].rc_active:
+			all_wikis[wiki_url].rc_active = value
+	if replayed:
+		logger.info("Replayed {} checkpoints from the journal.".format(replayed))
+		await DBHandler.flush()
+	await journal.compact(lambda: DBHandler.updated, force=True)  # everything else in it is in the database now
 
 
 class RcQueue:
 	def __init__(self):
 		self.domain_list = {}
-		self.to_remove = []
+		self.to_remove = set()
 		self.irc_mapping = {}
+		self.poll_slots: asyncio.Semaphore = None  # global limit of polls in progress across all domain groups
+		self.polls_in_flight = {}  # wiki_url: future done once its poll finished
 
 	async def start_group(self, group, initial_wikis):
 		"""Starts a task for given domain group"""
@@ -85,50 +113,73 @@ class RcQueue:
 						break
 				else:
 					irc_connection = None
-			self.domain_list[group] = {"task": asyncio.create_task(scan_group(group)), "last_rowid": 0, "query": LimitedList(initial_wikis), "rate_limiter": RateLimiter(), "irc": irc_connection}
+			schedule = PollScheduler()
+			for wiki_url in initial_wikis:
+				schedule.add(wiki_url)
+			workers = settings.get("concurrent_polls", {})
+			workers = workers.get(group, workers.get("default", 1))
+			rate_limiter = group_rate_limiter(group)
+			rate_limiter.set_share(shard_leases.share())
+			self.domain_list[group] = {"tasks": [asyncio.create_task(scan_group(group)) for _ in range(workers)], "schedule": schedule, "rate_limiter": rate_limiter, "irc": irc_connection, "session": session_pool.get(group)}
 			logger.debug(self.domain_list[group])
 		else:
 			raise KeyError
 
 	async def remove_wiki_from_group(self, wiki):
-		"""Removes a wiki from query of given domain group"""
-		logger.debug(f"Removing {wiki} from group queue.")
+		"""Removes a wiki from schedule of given domain group"""
+		logger.debug(f"Removing {wiki} from group schedule.")
 		group = get_domain(wiki)
-		self[group]["query"] = LimitedList([x for x in self[group]["query"] if x.url != wiki])
 		all_wikis[wiki].rc_active = -1
-		if not self[group]["query"]:  # if there is no wiki left in the queue, get rid of the task
-			logger.debug(f"{group} no longer has any wikis queued!")
+		if group not in self.domain_list:  # never scheduled here, e.g. polled by another worker
+			return
+		self[group]["schedule"].remove(wiki)
+		if not self[group]["schedule"]:  # if there is no wiki left in the schedule, get rid of the task
+			logger.debug(f"{group} no longer has any wikis scheduled!")
 			if not await self.check_if_domain_in_db(group):
 				await self.stop_task_group(group)
 			else:
 				logger.debug(f"But there are still wikis for it in DB!")
 
 	async def stop_task_group(self, group):
-		self[group]["task"].cancel()
+		for task in self[group]["tasks"]:
+			task.cancel()
 		del self.domain_list[group]
+		await session_pool.close(group)
 
 	async def check_if_domain_in_db(self, domain):
-		async with db.pool().acquire() as connection:
-			async with connection.transaction():
-				async for wiki in connection.cursor('SELECT DISTINCT wiki FROM rcgcdw WHERE rcid != -1;'):
-					if get_domain(wiki["wiki"]) == domain:
-						return True
-		return False
+		return await storage.domain_has_wikis(domain)
+
+	def apply_irc_updates(self, group):
+		"""Makes wikis of given group which were reported as updated by IRC feed due right away"""
+		irc_connection = self[group]["irc"]
+		if irc_connection and irc_connection.updated:
+			schedule = self[group]["schedule"]
+			for wiki_url in [url for url in irc_connection.updated if url in schedule]:
+				irc_connection.updated.discard(wiki_url)
+				schedule.poke(wiki_url)
+				logger.debug("Updated in IRC so scheduling {} right away.".format(wiki_url))
 
 	@asynccontextmanager
-	async def retrieve_next_queued(self, group) -> Generator[QueuedWiki, None, None]:
-		"""Retrives next wiki in the queue for given domain"""
-		if len(self.domain_list[group]["query"]) == 0:
-			# make sure we are not removing the group because entire domain group went down, it's expensive - yes, but could theoretically cause issues
-			raise QueueEmpty
-			# if self.check_if_domain_in_db(group):
-			# 	#logger.warning("Domain group {} has 0 elements yet there are still wikis in the db of the same domain group! This may indicate we ran over the list too fast. We are waiting...".format(group))
-			# 	raise QueueEmpty
-			# else:
-			# 	await self.stop_task_group(group)
-			# 	return
+	async def retrieve_next_queued(self, group) -> AsyncGenerator[str, None]:
+		"""Waits for the next due wiki of given domain group and schedules its next check once it's done"""
+		schedule: PollScheduler = self.domain_list[group]["schedule"]
+		while True:
+			if not schedule:
+				raise QueueEmpty
+			self.apply_irc_updates(group)
+			wiki_url = await schedule.take_next(max_wait=1.0)
+			if wiki_url is not None and not shard_leases.owns(wiki_url):
+				if shard_leases.assigned(wiki_url):  # lease wasn't renewed in time (database outage), wait for the next heartbeat
+					schedule.reschedule(wiki_url, shard_leases.ttl / 4)
+				else:  # the lease on its shard has been lost or given away
+					schedule.remove(wiki_url)
+				continue
+			if wiki_url is not None:
+				break
+		finished = self.polls_in_flight[wiki_url] = asyncio.get_running_loop().create_future()
 		try:
-			yield self.domain_list[group]["query"][0]
+			async with self.poll_slots:
+				yield wiki_url
 		except asyncio.CancelledError:
 			raise
 		except:
@@ -138,67 +189,80 @@ class RcQueue:
 			else:
 				logger.exception("Group task returned error")
 				await generic_msg_sender_exception_logger(traceback.format_exc(), "Group task error logger", Group=group)
-		else:
-			self.domain_list[group]["query"].pop(0)
-
+		finally:
+			del self.polls_in_flight[wiki_url]
+			finished.set_result(None)
+		schedule.reschedule(wiki_url, calculate_poll_interval(all_wikis.get(wiki_url), self.domain_list[group]["irc"] is not None))
+
+	async def finish_polls(self, shards: set) -> bool:
+		"""Waits for polls of wikis in given shards and saves their checkpoints, so the shards can be released to other
+		workers. Returns False if some polls didn't finish in time."""
+		polls = [finished for wiki_url, finished in self.polls_in_flight.items() if shard_leases.shard_of(wiki_url) in shards]
+		if polls:
+			done, pending = await asyncio.wait(polls, timeout=shard_leases.ttl / 4)
+			if pending:
+				return False
+		await DBHandler.flush()
+		return True
 
 	@staticmethod
 	def filter_rc_active(wiki_obj):
 		return wiki_obj[1].rc_active is None or wiki_obj[1].rc_active > -1
 
+	async def add_wiki(self, wiki_url: str, rcid):
+		"""Makes sure an active wiki from the DB is known and scheduled, if this worker owns it"""
+		if wiki_url not in all_wikis:
+			all_wikis[wiki_url] = Wiki()
+			all_wikis[wiki_url].rc_active = rcid
+		if not shard_leases.owns(wiki_url):
+			return  # polled by another worker
+		domain = get_domain(wiki_url)
+		try:
+			schedule = self[domain]["schedule"]
+		except KeyError:
+			await self.start_group(domain, [wiki_url])
+			logger.info("A new domain group ({}) has been added since last time, adding it to the domain_list and starting a task...".format(domain))
+		else:
+			if wiki_url not in schedule and shard_leases.enabled:  # shard taken over from another worker, its progress is only in the DB
+				all_wikis[wiki_url] = Wiki()
+				all_wikis[wiki_url].rc_active = rcid
+			schedule.add(wiki_url)
+
+	async def update_wikis(self, wikis: set):
+		"""Applies subscription changes of given wikis only, the cost depends on the number of changed wikis"""
+		try:
+			rows = await storage.rc_wikis(wikis)
+			await target_index.update(wikis)
+			active = set()
+			for db_wiki in rows:
+				active.add(db_wiki["wiki"])
+				await self.add_wiki(db_wiki["wiki"], db_wiki["rcid"])
+			for wiki in wikis - active:
+				if wiki in all_wikis and self.filter_rc_active((wiki, all_wikis[wiki])):
+					await self.remove_wiki_from_group(wiki)
+			logger.debug("Applied subscription changes of {} wikis.".format(len(wikis)))
+		except asyncio.CancelledError:
+			raise
+		except:
+			logger.exception("Exception on applying subscription changes")
+			await generic_msg_sender_exception_logger(traceback.format_exc(), "Subscription updater")
+
 	async def update_queues(self):
-		"""Makes a round on rcgcdb DB and looks for updates to the queues in self.domain_list"""
+		"""Makes a full round on rcgcdb DB and looks for wikis that should be added to or removed from schedules in self.domain_list.
+		Subscription changes are normally applied by update_wikis, this is only a safety net for missed notifications."""
 		try:
-			self.to_remove = [x[0] for x in filter(self.filter_rc_active, all_wikis.items())]  # first populate this list and remove wikis that are still in the db, clean up the rest
-			full = set()
-			async with db.pool().acquire() as connection:
-				async with connection.transaction():
-					async for db_wiki in connection.cursor('SELECT DISTINCT wiki, row_number() OVER (ORDER BY webhook) AS rowid, webhook, lang, display, rcid FROM rcgcdw WHERE rcid != -1 OR rcid IS NULL ORDER BY webhook'):
-						domain = get_domain(db_wiki["wiki"])
-						try:
-							if db_wiki["wiki"] not in all_wikis:
-								raise AssertionError
-							self.to_remove.remove(db_wiki["wiki"])
-						except AssertionError:
-							all_wikis[db_wiki["wiki"]] = Wiki()
-							all_wikis[db_wiki["wiki"]].rc_active = db_wiki["rcid"]
-						except ValueError:
-							pass
-						if domain in full:
-							continue
-						try:
-							current_domain: dict = self[domain]
-							if current_domain["irc"]:
-								logger.debug("DOMAIN LIST FOR IRC: {}".format(current_domain["irc"].updated))
-								logger.debug("CURRENT DOMAIN INFO: {}".format(domain))
-								logger.debug("IS WIKI IN A LIST?: {}".format(db_wiki["wiki"] in current_domain["irc"].updated))
-								logger.debug("LAST CHECK FOR THE WIKI {} IS {}".format(db_wiki["wiki"], all_wikis[db_wiki["wiki"]].last_check))
-								if db_wiki["wiki"] in current_domain["irc"].updated:  # Priority wikis are the ones with IRC, if they get updated forcefully add them to queue
-									current_domain["irc"].updated.remove(db_wiki["wiki"])
-									current_domain["query"].append(QueuedWiki(db_wiki["wiki"], 20), forced=True)
-									logger.debug("Updated in IRC so adding to queue.")
-									continue
-								elif all_wikis[db_wiki["wiki"]].last_check+settings["irc_overtime"] < time.time():  # if time went by and wiki should be updated now use default mechanics
-									logger.debug("Overtime so adding to queue.")
-									pass
-								else:  # Continue without adding
-									logger.debug("No condition fulfilled so skipping.")
-									continue
-							if not db_wiki["rowid"] < current_domain["last_rowid"]:
-								current_domain["query"].append(QueuedWiki(db_wiki["wiki"], 20))
-						except KeyError:
-							await self.start_group(domain, [QueuedWiki(db_wiki["wiki"], 20)])
-							logger.info("A new domain group ({}) has been added since last time, adding it to the domain_list and starting a task...".format(domain))
-						except ListFull:
-							full.add(domain)
-							current_domain["last_rowid"] = db_wiki["rowid"]
-							continue
+			self.to_remove = {x[0] for x in filter(self.filter_rc_active, all_wikis.items())}  # first populate this set and remove wikis that are still in the db, clean up the rest
+			for db_wiki in await storage.rc_wikis():
+				self.to_remove.discard(db_wiki["wiki"])
+				await self.add_wiki(db_wiki["wiki"], db_wiki["rcid"])
 			for wiki in self.to_remove:
 				await self.remove_wiki_from_group(wiki)
-			for group, data in self.domain_list.items():
-				if group not in full:
-					self[group]["last_rowid"] = 0  # iter reached the end without being stuck on full list
-			logger.debug("Current domain_list structure: {}".format(self.domain_list))
+			await target_index.load()
+			if shard_leases.enabled:
+				for data in self.domain_list.values():
+					for wiki_url in [url for url in data["schedule"] if not shard_leases.owns(url)]:
+						data["schedule"].remove(wiki_url)
+					data["rate_limiter"].set_share(shard_leases.share())
 		except:
 			if command_line_args.debug:
 				logger.exception("Queue error!")
@@ -207,6 +271,16 @@ class RcQueue:
 				logger.exception("Exception on queue updater")
 				await generic_msg_sender_exception_logger(traceback.format_exc(), "Queue updator")
 
+	def log_statistics(self):
+		logger.debug("Current schedule: {}".format(self.schedule_snapshot()))
+		logger.debug("Connection pool statistics: {}".format(session_pool.statistics()))
+		logger.debug("Rate limiter statistics: {}".format({group: data["rate_limiter"].statistics() for group, data in self.domain_list.items()}))
+		logger.debug("Subscription notifications received: {}".format(subscription_feed.notifications))
+		logger.debug("Enrichment statistics: {}".format(enrichment_cache.statistics()))
+
+	def schedule_snapshot(self) -> dict:
+		"""Returns the schedule of every domain group, see PollScheduler.snapshot"""
+		return {group: data["schedule"].snapshot() for group, data in self.domain_list.items()}
 
 	def __getitem__(self, item):
 		"""Returns the query of given domain group"""
@@ -221,29 +295,18 @@ rcqueue = RcQueue()
 
 # Start queueing logic
 
-def calculate_delay_for_group(group_length: int) -> float:
-	"""Calculate the delay between fetching each wiki to avoid rate limits"""
-	min_delay = 60 / settings["max_requests_per_minute"]
-	if group_length == 0:
-		group_length = 1
-	if (group_length * min_delay) < settings["minimal_cooldown_per_wiki_in_sec"]:
-		return settings["minimal_cooldown_per_wiki_in_sec"] / group_length
-	else:
-		return 0.0
-
-
-async def generate_targets(wiki_url: str, additional_requirements: str) -> defaultdict:
-	"""To minimize the amount of requests, we generate a list of language/display mode combinations to create messages for
-	this way we can send the same message to multiple webhooks which have the same wiki and settings without doing another
-	request to the wiki just to duplicate the message.
-	"""
-	combinations = defaultdict(list)
-	async with db.pool().acquire() as connection:
-		async with connection.transaction():
-			async for webhook in connection.cursor('SELECT webhook, lang, display, buttons FROM rcgcdw WHERE wiki = $1 {}'.format(additional_requirements), wiki_url):
-				combination = (webhook["lang"], webhook["display"], webhook["buttons"])
-				combinations[combination].append(webhook["webhook"])
-	return combinations
+def calculate_poll_interval(wiki: Wiki, irc: bool) -> float:
+	"""Calculate how long to wait before checking the wiki again, wikis with more changes are checked more often.
+	Wikis on domains with IRC feed are checked when feed reports a change or after irc_overtime at latest."""
+	min_interval = settings["minimal_cooldown_per_wiki_in_sec"]
+	max_interval = settings["irc_overtime"] if irc else settings.get("maximal_cooldown_per_wiki_in_sec", 900)
+	if wiki is None:
+		return max_interval
+	if wiki.event_rate is None:  # not measured yet (new subscription, restart), check again soon to measure it
+		return min_interval
+	if wiki.event_rate <= 0:
+		return max_interval
+	return max(min_interval, min(max_interval, 1 / wiki.event_rate))
 
 
 async def generate_domain_groups():
@@ -251,113 +314,176 @@ async def generate_domain_groups():
 
 	:returns tuple[str, list]"""
 	domain_wikis = defaultdict(list)
-	async with db.pool().acquire() as connection:
-		async with connection.transaction():
-			async for db_wiki in connection.cursor('SELECT DISTINCT wiki, webhook, lang, display, rcid FROM rcgcdw WHERE rcid != -1 OR rcid IS NULL'):
-				domain_wikis[get_domain(db_wiki["wiki"])].append(QueuedWiki(db_wiki["wiki"], 20))
+	for db_wiki in await storage.rc_wikis():
+		if not shard_leases.owns(db_wiki["wiki"]):
+			continue
+		domain_wikis[get_domain(db_wiki["wiki"])].append(db_wiki["wiki"])
 	for group, db_wikis in domain_wikis.items():
 		yield group, db_wikis
 
 
+async def render_scan(wiki_url: str, local_wiki: Wiki, events: list, targets: dict, enrichment: ScanEnrichment) -> defaultdict:
+	"""Renders analysed events of a scan for every target, in a render process when there's enough of them.
+
+	:returns {(lang, display, buttons): [messages in the order of events]}"""
+	message_list = defaultdict(list)
+	target_list = list(targets.items())
+	rendered = None
+	if render_pool.should_offload(len(events) * len(target_list)):
+		rendered = await render_pool.render(events, local_wiki.context, target_list, enrichment)
+	results = iter(rendered) if rendered is not None else None
+	for event in events:
+		for target in target_list:
+			if results is not None:
+				result = next(results)
+				if isinstance(result, str):  # traceback of an exception in the render process
+					logger.error("Exception on RC formatter in a render process:\n{}".format(result))
+					await generic_msg_sender_exception_logger(result, "Exception in RC formatter", Wiki=wiki_url, Change=str(event.change)[0:1000])
+					continue
+				if not isinstance(result, EnrichmentMissing):
+					if result is not None:
+						message_list[target[0]].append(result)
+					continue
+			try:
+				message = await render_change(event, local_wiki, target, enrichment)
+				if message is not None:
+					message_list[target[0]].append(message)
+			except asyncio.CancelledError:
+				raise
+			except:
+				if command_line_args.debug:
+					logger.exception("Exception on RC formatter")
+					raise
+				else:
+					logger.exception("Exception on RC formatter")
+					await generic_msg_sender_exception_logger(traceback.format_exc(), "Exception in RC formatter", Wiki=wiki_url, Change=str(event.change)[0:1000])
+	return message_list
+
+
 async def scan_group(group: str):
+	"""A worker of given domain group, every group runs concurrent_polls of them. The schedule never hands the same wiki
+	to two workers at once and all of them share the group's rate limiter."""
 	rate_limiter = rcqueue[group]["rate_limiter"]
+	session = rcqueue[group]["session"]
 	while True:
 		try:
-			async with rcqueue.retrieve_next_queued(group) as queued_wiki:  # acquire next wiki in queue
-				if "irc" not in rcqueue[group]:
-					await asyncio.sleep(calculate_delay_for_group(len(rcqueue[group]["query"])))
-				logger.debug("Wiki {}".format(queued_wiki.url))
-				local_wiki = all_wikis[queued_wiki.url]  # set a reference to a wiki object from memory
+			async with rcqueue.retrieve_next_queued(group) as wiki_url:  # acquire next due wiki
+				logger.debug("Wiki {}".format(wiki_url))
+				local_wiki = all_wikis[wiki_url]  # set a reference to a wiki object from memory
 				extended = False
 				if local_wiki.mw_messages is None:
 					extended = True
-				async with aiohttp.ClientSession(headers=settings["header"],
-				                                 timeout=aiohttp.ClientTimeout(6.0)) as session:
+				local_wiki.session = session
+				metadata = local_wiki.metadata_outdated()
+				amount = local_wiki.rc_limit()
+				forward = local_wiki.last_timestamp is not None  # with rcstart the API returns oldest changes first
+				try:
+					wiki_response = await local_wiki.fetch_wiki(extended, wiki_url, session, rate_limiter, amount=amount,
+					                                            metadata=metadata, rcstart=local_wiki.last_timestamp)
+				except (WikiServerError, WikiError):
+					logger.error("Exeption when fetching the wiki")
+					continue  # ignore this wiki if it throws errors
+				async with wiki_response:  # makes sure the connection goes back to the group pool
 					try:
-						wiki_response = await local_wiki.fetch_wiki(extended, queued_wiki.url, session, rate_limiter, amount=queued_wiki.amount)
-						await local_wiki.check_status(queued_wiki.url, wiki_response.status)
+						await local_wiki.check_status(wiki_url, wiki_response.status)
 					except (WikiServerError, WikiError):
 						logger.error("Exeption when fetching the wiki")
 						continue  # ignore this wiki if it throws errors
+					if "json" not in wiki_response.content_type:
+						logger.error("Wiki seems to be resulting in non-json content.")
+						await local_wiki.fail_add(wiki_url, 410)
+						continue
 					try:
-						recent_changes_resp = await wiki_response.json()
+						recent_changes_resp, skipped, newest_timestamp = parse_recent_changes(await read_response(wiki_response), local_wiki.rc_active)
 						if not isinstance(recent_changes_resp, dict):
 							logger.error(f"recent_changes_resp has a bad type, found {type(recent_changes_resp)}, __repr__ here: {recent_changes_resp}.")
 							raise TypeError
 						if "error" in recent_changes_resp:
 							error = recent_changes_resp.get('error')
 							if error["code"] == "readapidenied":
-								await local_wiki.fail_add(queued_wiki.url, 410)
+								await local_wiki.fail_add(wiki_url, 410)
 								continue
 							raise WikiError
-					except aiohttp.ContentTypeError:
-						logger.exception("Wiki seems to be resulting in non-json content.")
-						await local_wiki.fail_add(queued_wiki.url, 410)
+					except ResponseTooLarge:
+						logger.error("Response of {} exceeds the max_response_size setting, skipping this check.".format(wiki_url))
 						continue
 					except:
 						logger.exception("On loading json of response.")
 						continue
 					try:
-						recent_changes = recent_changes_resp['query']['recentchanges']
-						recent_changes.reverse()
+						recent_changes = recent_changes_resp['query']['recentchanges']  # only changes we haven't seen yet
+						if not forward:
+							recent_changes.reverse()
+						if metadata:
+							local_wiki.update_metadata(wiki_url, recent_changes_resp)
 					except KeyError:
-						logger.error("recent_changes_resp returned KeyError on {}. skipping this check. (usually this happens when the wiki doesn't respond properly, it's pretty normal)".format(queued_wiki.url))
+						logger.error("recent_changes_resp returned KeyError on {}. skipping this check. (usually this happens when the wiki doesn't respond properly, it's pretty normal)".format(wiki_url))
 						continue
 				if extended:
 					await process_mwmsgs(recent_changes_resp, local_wiki, mw_msgs)
 				if local_wiki.rc_active in (0, None, -1):  # new wiki, just get the last rc to not spam the channel, -1 for -1 to NULL changes
 					if len(recent_changes) > 0:
 						local_wiki.rc_active = recent_changes[-1]["rcid"]
-						DBHandler.add(queued_wiki.url, recent_changes[-1]["rcid"])
+						local_wiki.last_timestamp = recent_changes[-1]["timestamp"]
+						DBHandler.add(wiki_url, recent_changes[-1]["rcid"])
 					else:
 						local_wiki.rc_active = 0
-						DBHandler.add(queued_wiki.url, 0)
+						DBHandler.add(wiki_url, 0)
+					local_wiki.update_activity(0)  # changes so far weren't new, they only tell where to start
 					await DBHandler.update_db()
 					continue
+				rc_continue = recent_changes_resp.get("continue", {}).get("rccontinue")
+				pages = 1
+				max_pages = settings.get("max_rc_pages", 5)
+				while rc_continue and pages < max_pages:  # page until we caught up with the wiki
+					if not forward and skipped:
+						break  # we reached changes we have already seen
+					try:
+						next_page, skipped, page_timestamp = await local_wiki.fetch_continuation(wiki_url, session, rate_limiter, amount, rc_continue)
+						page_changes = next_page["query"]["recentchanges"]
+					except (WikiServerError, KeyError):
+						logger.warning("Could not fetch next page of recent changes for {}, processing what we have.".format(wiki_url))
+						break
+					if page_timestamp is not None and (newest_timestamp is None or page_timestamp > newest_timestamp):
+						newest_timestamp = page_timestamp
+					rc_continue = next_page.get("continue", {}).get("rccontinue")
+					pages += 1
+					if forward:
+						recent_changes.extend(page_changes)
+					else:
+						page_changes.reverse()
+						recent_changes[0:0] = page_changes
+				if rc_continue and pages >= max_pages and not (forward or skipped):
+					logger.warning("Reached max_rc_pages ({}) on {} before the last seen change {}, older changes were skipped.".format(
+						max_pages, wiki_url, local_wiki.rc_active))
 				categorize_events = {}
-				targets = await generate_targets(queued_wiki.url, "AND (rcid != -1 OR rcid IS NULL)")
-				paths = get_paths(queued_wiki.url, recent_changes_resp)
-				new_events = 0
-				local_wiki.last_check = time.time()  # on successful check, save new last check time
+				targets = target_index.rc_targets(wiki_url)
+				local_wiki.update_activity(len(recent_changes))  # on successful check, save new last check time
 				for change in recent_changes:
-					if change["rcid"] > local_wiki.rc_active and queued_wiki.amount != 450:
-						new_events += 1
-						if new_events == 20:
-							# call the function again with max limit for more results, ignore the ones in this request
-							logger.debug("There were too many new events, queuing wiki with 450 limit.")
-							rcqueue[group]["query"].insert(1, QueuedWiki(queued_wiki.url, 450))
-							break
 					await process_cats(change, local_wiki, mw_msgs, categorize_events)
-				else:  # If we broke from previous loop (too many changes) don't execute sending messages here
-					highest_rc = local_wiki.rc_active  # setup var for later use
-					message_list = defaultdict(list)
-					for change in recent_changes:  # Yeah, second loop since the categories require to be all loaded up
-						if change["rcid"] > local_wiki.rc_active:
-							if highest_rc is None or change["rcid"] > highest_rc:  # make sure that the highest_rc is really highest rcid but do allow other entries with potentially lesser rcids come after without breaking the cycle
-								highest_rc = change["rcid"]
-							for target in targets.items():
-								try:
-									message = await essential_info(change, categorize_events, local_wiki, target, paths,
-									                     recent_changes_resp, rate_limiter)
-									if message is not None:
-										message_list[target[0]].append(message)
-								except asyncio.CancelledError:
-									raise
-								except:
-									if command_line_args.debug:
-										logger.exception("Exception on RC formatter")
-										raise
-									else:
-										logger.exception("Exception on RC formatter")
-										await generic_msg_sender_exception_logger(traceback.format_exc(), "Exception in RC formatter", Wiki=queued_wiki.url, Change=str(change)[0:1000])
-					# Lets stack the messages
-					for messages in message_list.values():
-						messages = stack_message_list(messages)
-						for message in messages:
-							await send_to_discord(message)
-					if recent_changes:  # we don't have to test for highest_rc being null, because if there are no RC entries recent_changes will be an empty list which will result in false in here and DO NOT save the value
-						local_wiki.rc_active = highest_rc
-						DBHandler.add(queued_wiki.url, highest_rc)
+				highest_rc = local_wiki.rc_active  # setup var for later use
+				events = []
+				for change in recent_changes:  # Yeah, second loop since the categories require to be all loaded up
+					if change["rcid"] > local_wiki.rc_active:
+						if highest_rc is None or change["rcid"] > highest_rc:  # make sure that the highest_rc is really highest rcid but do allow other entries with potentially lesser rcids come after without breaking the cycle
+							highest_rc = change["rcid"]
+						local_wiki.check_metadata(change)
+						event = analyze_change(change, categorize_events, local_wiki)  # done once, whatever the number of targets
+						if event is not None:
+							events.append(event)
+				enrichment = ScanEnrichment(wiki_url, local_wiki, rate_limiter)  # shared by all targets
+				await enrichment.prefetch(events, targets.keys())
+				message_list = await render_scan(wiki_url, local_wiki, events, targets, enrichment)
+				# Lets stack the messages
+				for messages in message_list.values():
+					messages = stack_message_list(messages)
+					for message in messages:
+						await send_to_discord(message)
+				if recent_changes:  # we don't have to test for highest_rc being null, because if there are no RC entries recent_changes will be an empty list which will result in false in here and DO NOT save the value
+					local_wiki.rc_active = highest_rc
+					DBHandler.add(wiki_url, highest_rc)
+				if newest_timestamp is not None:
+					local_wiki.last_timestamp = newest_timestamp
 				await DBHandler.update_db()
 		except asyncio.CancelledError:
 			return
@@ -370,14 +496,33 @@ async def wiki_scanner():
 	"""Wiki scanner is spawned as a task which purpose is to continuously run over wikis in the DB, fetching recent changes
 	to add messages based on the changes to message queue later handled by message_sender coroutine."""
 	try:
+		rcqueue.poll_slots = asyncio.Semaphore(settings.get("max_concurrent_polls", 50))
+		await subscription_feed.setup()
+		try:
+			await subscription_feed.listen()  # before the first scan, so no change can slip in between
+		except (OSError, asyncpg.PostgresError):
+			logger.exception("Could not listen for subscription changes, will retry.")
 		async for group, db_wikis in generate_domain_groups():  # First scan
 			await rcqueue.start_group(group, db_wikis)
+		full_sync_interval = settings.get("full_sync_interval_in_sec", 900)
+		last_full_sync = time.monotonic()
+		shard_generation = shard_leases.generation
 		while True:
-			await asyncio.sleep(20.0)
-			await rcqueue.update_queues()
+			changed = await subscription_feed.changes(timeout=20.0)
+			if changed is None or shard_generation != shard_leases.generation or time.monotonic() - last_full_sync > full_sync_interval:
+				shard_generation = shard_leases.generation
+				last_full_sync = time.monotonic()
+				await rcqueue.update_queues()
+			elif changed:
+				await rcqueue.update_wikis(changed)
+			rcqueue.log_statistics()
 	except asyncio.CancelledError:
 		for item in rcqueue.domain_list.values():  # cancel running tasks
-			item["task"].cancel()
+			for task in item["tasks"]:
+				task.cancel()
+		await session_pool.close_all()
+		await subscription_feed.close()
+		await DBHandler.flush()
 		raise
 
 
@@ -407,112 +552,112 @@ async def discussion_handler():
 		raise asyncio.CancelledError
 	try:
 		while True:
-			async with db.pool().acquire() as connection:
-				async with connection.transaction():
-					async for db_wiki in connection.cursor("SELECT DISTINCT wiki, rcid, postid FROM rcgcdw WHERE postid != '-1' OR postid IS NULL"):
-						try:
-							local_wiki = all_wikis[db_wiki["wiki"]]  # set a reference to a wiki object from memory
-						except KeyError:
-							local_wiki = all_wikis[db_wiki["wiki"]] = Wiki()
-							local_wiki.rc_active = db_wiki["rcid"]
-						if db_wiki["wiki"] not in rcqueue.irc_mapping["fandom.com"].updated_discussions and \
-								local_wiki.last_discussion_check+settings["irc_overtime"] > time.time():  # I swear if another wiki farm ever starts using Fandom discussions I'm gonna use explosion magic
-							continue
-						else:
-							try:
-								rcqueue.irc_mapping["fandom.com"].updated_discussions.remove(db_wiki["wiki"])
-							except KeyError:
-								pass  # to be expected
-						header = settings["header"]
-						header["Accept"] = "application/hal+json"
-						async with aiohttp.ClientSession(headers=header,
-						                                 timeout=aiohttp.ClientTimeout(6.0)) as session:
-							try:
-								feeds_response = await local_wiki.fetch_feeds(db_wiki["wiki"], session)
-							except (WikiServerError, WikiError):
-								continue  # ignore this wiki if it throws errors
-							try:
-								discussion_feed_resp = await feeds_response.json(encoding="UTF-8")
-								if "error" in discussion_feed_resp:
-									error = discussion_feed_resp["error"]
-									if error == "NotFoundException":  # Discussions disabled
-										if db_wiki["rcid"] != -1:  # RC feed is disabled
-											await connection.execute("UPDATE rcgcdw SET postid = $1 WHERE wiki = $2", "-1", db_wiki["wiki"])
-										else:
-											await local_wiki.remove(db_wiki["wiki"], 1000)
-										await DBHandler.update_db()
-										continue
-									raise WikiError
-								discussion_feed = discussion_feed_resp["_embedded"]["doc:posts"]
-								discussion_feed.reverse()
-							except aiohttp.ContentTypeError:
-								logger.exception("Wiki seems to be resulting in non-json content.")
-								continue
-							except asyncio.TimeoutError:
-								logger.debug("Timeout on reading JSON of discussion post feeed.")
-								continue
-							except:
-								logger.exception("On loading json of response.")
+			for db_wiki in await storage.feeds_wikis():
+				if not shard_leases.owns(db_wiki["wiki"]):
+					continue
+				try:
+					local_wiki = all_wikis[db_wiki["wiki"]]  # set a reference to a wiki object from memory
+				except KeyError:
+					local_wiki = all_wikis[db_wiki["wiki"]] = Wiki()
+					local_wiki.rc_active = db_wiki["rcid"] if db_wiki["rc"] else -1
+				if db_wiki["wiki"] not in rcqueue.irc_mapping["fandom.com"].updated_discussions and \
+						local_wiki.last_discussion_check+settings["irc_overtime"] > time.time():  # I swear if another wiki farm ever starts using Fandom discussions I'm gonna use explosion magic
+					continue
+				else:
+					try:
+						rcqueue.irc_mapping["fandom.com"].updated_discussions.remove(db_wiki["wiki"])
+					except KeyError:
+						pass  # to be expected
+				session = session_pool.get(get_domain(db_wiki["wiki"]))
+				rate_limiter = group_rate_limiter(get_domain(db_wiki["wiki"]))
+				local_wiki.session = session
+				try:
+					feeds_response = await local_wiki.fetch_feeds(db_wiki["wiki"], session, rate_limiter)
+				except (WikiServerError, WikiError):
+					continue  # ignore this wiki if it throws errors
+				async with feeds_response:  # makes sure the connection goes back to the group pool
+					try:
+						discussion_feed_resp = await feeds_response.json(encoding="UTF-8", loads=codec.loads)
+						if "error" in discussion_feed_resp:
+							error = discussion_feed_resp["error"]
+							if error == "NotFoundException":  # Discussions disabled
+								if db_wiki["rc"]:  # RC feed is still enabled
+									await storage.disable_feeds(db_wiki["wiki"])
+								else:
+									await local_wiki.remove(db_wiki["wiki"], 1000)
+								await DBHandler.update_db()
 								continue
-						if db_wiki["postid"] is None:  # new wiki, just get the last post to not spam the channel
-							if len(discussion_feed) > 0:
-								DBHandler.add(db_wiki["wiki"], discussion_feed[-1]["id"], True)
-							else:
-								DBHandler.add(db_wiki["wiki"], "0", True)
-							await DBHandler.update_db()
-							continue
-						comment_events = []
-						targets = await generate_targets(db_wiki["wiki"], "AND NOT postid = '-1'")
-						for post in discussion_feed:
-							if post["_embedded"]["thread"][0]["containerType"] == "ARTICLE_COMMENT" and post["id"] > db_wiki["postid"]:
-								comment_events.append(post["forumId"])
-						comment_pages: dict = {}
-						if comment_events:
+							raise WikiError
+						discussion_feed = discussion_feed_resp["_embedded"]["doc:posts"]
+						discussion_feed.reverse()
+					except aiohttp.ContentTypeError:
+						logger.exception("Wiki seems to be resulting in non-json content.")
+						continue
+					except asyncio.TimeoutError:
+						logger.debug("Timeout on reading JSON of discussion post feeed.")
+						continue
+					except:
+						logger.exception("On loading json of response.")
+						continue
+				if db_wiki["postid"] is None:  # new wiki, just get the last post to not spam the channel
+					if len(discussion_feed) > 0:
+						DBHandler.add(db_wiki["wiki"], discussion_feed[-1]["id"], True)
+					else:
+						DBHandler.add(db_wiki["wiki"], "0", True)
+					await DBHandler.update_db()
+					continue
+				comment_events = []
+				targets = target_index.feeds_targets(db_wiki["wiki"])
+				for post in discussion_feed:
+					if post["_embedded"]["thread"][0]["containerType"] == "ARTICLE_COMMENT" and post["id"] > db_wiki["postid"]:
+						comment_events.append(post["forumId"])
+				comment_pages: dict = {}
+				if comment_events:
+					try:
+						comment_pages = await local_wiki.safe_request(
+							"{wiki}wikia.php?controller=FeedsAndPosts&method=getArticleNamesAndUsernames&stablePageIds={pages}&format=json".format(
+								wiki=db_wiki["wiki"], pages=",".join(comment_events)
+							), rate_limiter, "articleNames")
+					except aiohttp.ClientResponseError:  # Fandom can be funny sometimes... See #30
+						comment_pages = None
+					except:
+						if command_line_args.debug:
+							logger.exception("Exception on Feeds article comment request")
+							shutdown(loop=asyncio.get_event_loop())
+						else:
+							logger.exception("Exception on Feeds article comment request")
+							await generic_msg_sender_exception_logger(traceback.format_exc(),
+							                                          "Exception on Feeds article comment request",
+							                                          Post=str(post)[0:1000], Wiki=db_wiki["wiki"])
+				message_list = defaultdict(list)
+				for post in discussion_feed:  # Yeah, second loop since the comments require an extra request
+					if post["id"] > db_wiki["postid"]:
+						for target in targets.items():
 							try:
-								comment_pages = await local_wiki.safe_request(
-									"{wiki}wikia.php?controller=FeedsAndPosts&method=getArticleNamesAndUsernames&stablePageIds={pages}&format=json".format(
-										wiki=db_wiki["wiki"], pages=",".join(comment_events)
-									), RateLimiter(), "articleNames")
-							except aiohttp.ClientResponseError:  # Fandom can be funny sometimes... See #30
-								comment_pages = None
+								message = await essential_feeds(post, comment_pages, db_wiki, target)
+								if message is not None:
+									message_list[target[0]].append(message)
+							except asyncio.CancelledError:
+								raise
 							except:
 								if command_line_args.debug:
-									logger.exception("Exception on Feeds article comment request")
+									logger.exception("Exception on Feeds formatter")
 									shutdown(loop=asyncio.get_event_loop())
 								else:
-									logger.exception("Exception on Feeds article comment request")
-									await generic_msg_sender_exception_logger(traceback.format_exc(),
-									                                          "Exception on Feeds article comment request",
-									                                          Post=str(post)[0:1000], Wiki=db_wiki["wiki"])
-						message_list = defaultdict(list)
-						for post in discussion_feed:  # Yeah, second loop since the comments require an extra request
-							if post["id"] > db_wiki["postid"]:
-								for target in targets.items():
-									try:
-										message = await essential_feeds(post, comment_pages, db_wiki, target)
-										if message is not None:
-											message_list[target[0]].append(message)
-									except asyncio.CancelledError:
-										raise
-									except:
-										if command_line_args.debug:
-											logger.exception("Exception on Feeds formatter")
-											shutdown(loop=asyncio.get_event_loop())
-										else:
-											logger.exception("Exception on Feeds formatter")
-											await generic_msg_sender_exception_logger(traceback.format_exc(), "Exception in feed formatter", Post=str(post)[0:1000], Wiki=db_wiki["wiki"])
-						# Lets stack the messages
-						for messages in message_list.values():
-							messages = stack_message_list(messages)
-							for message in messages:
-								await send_to_discord(message)
-						if discussion_feed:
-							DBHandler.add(db_wiki["wiki"], post["id"], True)
-						await asyncio.sleep(delay=2.0)  # hardcoded really doesn't need much more
+									logger.exception("Exception on Feeds formatter")
+									await generic_msg_sender_exception_logger(traceback.format_exc(), "Exception in feed formatter", Post=str(post)[0:1000], Wiki=db_wiki["wiki"])
+				# Lets stack the messages
+				for messages in message_list.values():
+					messages = stack_message_list(messages)
+					for message in messages:
+						await send_to_discord(message)
+				if discussion_feed:
+					DBHandler.add(db_wiki["wiki"], post["id"], True)
+				await asyncio.sleep(delay=2.0)  # hardcoded really doesn't need much more
 			await asyncio.sleep(delay=1.0) # Avoid lock on no wikis
-			await DBHandler.update_db()
+			await DBHandler.flush()  # next round reads post ids from the DB
 	except asyncio.CancelledError:
-		pass
+		await DBHandler.flush()
 	except:
 		if command_line_args.debug:
 			raise  # reraise the issue
@@ -530,6 +675,7 @@ def shutdown(loop, signal=None):
 		for task in (main_tasks["wiki_scanner"], main_tasks["discussion_handler"], main_tasks["msg_queue_shield"]):
 			task.cancel()
 		loop.run_until_complete(main_tasks["message_sender"])
+	render_pool.shutdown()
 	for task in asyncio.all_tasks(loop):
 		logger.debug("Killing task")
 		task.cancel()
@@ -557,7 +703,20 @@ async def main_loop():
 	nest_asyncio.apply(loop)
 	await db.setup_connection()
 	logger.debug("Connection type: {}".format(db.connection))
-	await populate_allwikis()
+	if command_line_args.migrate:
+		await storage.migrate()
+		await db.shutdown_connection()
+		return
+	if not await storage.schema_ready():
+		logger.critical("Database schema is outdated, run start.py --migrate first.")
+		await db.shutdown_connection()
+		return
+	await replay_journal(await populate_allwikis())
+	await target_index.load()
+	if shard_leases.enabled:
+		shard_leases.before_release = rcqueue.finish_polls
+		await shard_leases.setup()
+		await shard_leases.heartbeat()  # claim our shards before the first scan
 	try:
 		signals = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT)
 		for s in signals:
@@ -571,9 +730,11 @@ async def main_loop():
 		main_tasks = {"wiki_scanner": asyncio.create_task(wiki_scanner()), "message_sender": asyncio.create_task(message_sender()),
 		              "discussion_handler": asyncio.create_task(discussion_handler())}
 		main_tasks["msg_queue_shield"] = asyncio.shield(main_tasks["message_sender"])
+		if shard_leases.enabled:
+			main_tasks["shard_leases"] = asyncio.create_task(shard_leases.run())
 		await asyncio.gather(main_tasks["wiki_scanner"], main_tasks["discussion_handler"], main_tasks["message_sender"])
 	except KeyboardInterrupt:
-		await DBHandler.update_db()
+		await DBHandler.flush()
 		await db.shutdown_connection()
 		shutdown(loop)
 	except asyncio.CancelledError:
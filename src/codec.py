@@ -0,0 +1,30 @@
+import json
+import logging
+
+logger = logging.getLogger("rcgcdb.codec")
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+# orjson's error is a subclass of json.JSONDecodeError, catching this one works with both
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+	backend = "orjson"
+	loads = orjson.loads
+
+	def dumps(obj) -> bytes:
+		"""Serializes obj to compact UTF-8 encoded JSON"""
+		return orjson.dumps(obj)
+else:
+	backend = "json"
+	loads = json.loads
+	_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+	def dumps(obj) -> bytes:
+		"""Serializes obj to compact UTF-8 encoded JSON"""
+		return _encoder.encode(obj).encode("utf-8")
+
+logger.debug("Using {} for JSON.".format(backend))
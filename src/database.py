@@ -19,6 +19,12 @@ class db_connection:
                                                     port=settings.get("pg_port", 5432), min_size=10, max_size=40)
         logger.debug("Database connection established! Connection: {}".format(self.connection))
 
+    async def dedicated_connection(self) -> asyncpg.Connection:
+        """Opens a connection outside of the pool, for listeners that have to keep it for the whole runtime"""
+        return await asyncpg.connect(user=settings["pg_user"], host=settings.get("pg_host", "localhost"),
+                                     database=settings.get("pg_db", "rcgcdb"), password=settings.get("pg_pass"),
+                                     port=settings.get("pg_port", 5432))
+
     async def shutdown_connection(self):
         logger.debug("Shutting down database connection...")
         await self.connection.close()
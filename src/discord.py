@@ -1,11 +1,12 @@
-import json, random, math, logging
+import random, math, logging
 from collections import defaultdict
 
 from src.misc import logger
 from src.config import settings
-from src.database import db
+from src import storage, codec
 from src.i18n import langs
 from src.exceptions import EmbedListFull
+from src.targets import target_index
 from asyncio import TimeoutError
 from math import ceil
 
@@ -22,19 +23,17 @@ default_header["X-RateLimit-Precision"] = "millisecond"
 
 # User facing webhook functions
 async def wiki_removal(wiki_url, status):
-	async with db.pool().acquire() as connection:
-		async with connection.transaction():
-			async for observer in connection.cursor('SELECT webhook, lang FROM rcgcdw WHERE wiki = $1', wiki_url):
-				_ = langs[observer["lang"]]["discord"].gettext
-				reasons = {410: _("wiki deleted"), 404: _("wiki deleted"), 401: _("wiki inaccessible"),
-				           402: _("wiki inaccessible"), 403: _("wiki inaccessible"), 1000: _("discussions disabled")}
-				reason = reasons.get(status, _("unknown error"))
-				await send_to_discord_webhook(DiscordMessage("compact", "webhook/remove", webhook_url=[], content=_("This recent changes webhook has been removed for `{reason}`!").format(reason=reason), wiki=None), webhook_url=observer["webhook"])
-				header = settings["header"]
-				header['Content-Type'] = 'application/json'
-				header['X-Audit-Log-Reason'] = "Wiki becoming unavailable"
-				async with aiohttp.ClientSession(headers=header, timeout=aiohttp.ClientTimeout(5.0)) as session:
-					await session.delete("https://discord.com/api/webhooks/"+observer["webhook"])
+	for observer in await storage.observers(wiki_url):
+		_ = langs[observer["lang"]]["discord"].gettext
+		reasons = {410: _("wiki deleted"), 404: _("wiki deleted"), 401: _("wiki inaccessible"),
+		           402: _("wiki inaccessible"), 403: _("wiki inaccessible"), 1000: _("discussions disabled")}
+		reason = reasons.get(status, _("unknown error"))
+		await send_to_discord_webhook(DiscordMessage("compact", "webhook/remove", webhook_url=[], content=_("This recent changes webhook has been removed for `{reason}`!").format(reason=reason), wiki=None), webhook_url=observer["webhook"])
+		header = settings["header"]
+		header['Content-Type'] = 'application/json'
+		header['X-Audit-Log-Reason'] = "Wiki becoming unavailable"
+		async with aiohttp.ClientSession(headers=header, timeout=aiohttp.ClientTimeout(5.0)) as session:
+			await session.delete("https://discord.com/api/webhooks/"+observer["webhook"])
 
 
 async def webhook_removal_monitor(webhook_url: str, reason: int):
@@ -44,6 +43,7 @@ class DiscordMessage:
 	"""A class defining a typical Discord JSON representation of webhook payload."""
 	def __init__(self, message_type: str, event_type: str, webhook_url: list, wiki, content=None):
 		self.webhook_object = dict(allowed_mentions={"parse": []})
+		self._payload = None  # serialized webhook_object, reset by every change of the message
 		self.webhook_url = webhook_url
 		self.wiki = wiki
 		self.length = 0
@@ -65,6 +65,7 @@ class DiscordMessage:
 
 	def __setitem__(self, key, value):
 		"""Set item is used only in embeds."""
+		self._payload = None
 		try:
 			if key in ('title', 'description'):
 				self.length += len(value) - len(self.embed.get(key, ""))
@@ -73,11 +74,28 @@ class DiscordMessage:
 			raise TypeError("Tried to assign a value when message type is plain message!")
 
 	def __getitem__(self, item):
+		self._payload = None  # returned dicts can be changed (message["image"]["url"] = ...)
 		return self.embed[item]
 
 	def __repr__(self):
 		"""Return the Discord webhook object ready to be sent"""
-		return json.dumps(self.webhook_object)
+		return self.payload().decode("utf-8")
+
+	def payload(self) -> bytes:
+		"""Returns the webhook object serialized to JSON, only once however many webhooks or retries it's sent to"""
+		if self._payload is None:
+			self._payload = codec.dumps(self.webhook_object)
+		return self._payload
+
+	def freeze(self) -> "QueuedMessage":
+		"""Returns the finished message in the compact form kept by the message queue"""
+		return QueuedMessage(self.payload(), self.webhook_url, self.wiki, self.event_type, self.length)
+
+	def append_content(self, content: str):
+		"""Adds a line to a compact message"""
+		self._payload = None
+		self.webhook_object["content"] = self.webhook_object["content"] + "\n" + content
+		self.length += len(content) + 1
 
 	def _setup_embed(self):
 		"""Setup another embed"""
@@ -100,6 +118,7 @@ class DiscordMessage:
 		self.finish_embed_message()
 
 	def finish_embed_message(self):
+		self._payload = None
 		if "embeds" not in self.webhook_object:
 			self.webhook_object["embeds"] = [self.embed]
 		else:
@@ -108,17 +127,20 @@ class DiscordMessage:
 			self.webhook_object["embeds"].append(self.embed)
 
 	def set_author(self, name: str, url=None, icon_url=None):
+		self._payload = None
 		self.length += len(name)
 		self.embed["author"]["name"] = name
 		self.embed["author"]["url"] = url
 		self.embed["author"]["icon_url"] = icon_url
 
 	def set_footer(self, text: str, icon_url=None):
+		self._payload = None
 		self.length += len(text)
 		self.embed["footer"]["text"] = text
 		self.embed["footer"]["icon_url"] = icon_url
 
 	def add_field(self, name, value, inline=False):
+		self._payload = None
 		if "fields" not in self.embed:
 			self.embed["fields"] = []
 		self.length += len(name) + len(value)
@@ -127,6 +149,7 @@ class DiscordMessage:
 	def add_button(self, custom_id, label, style=2, emoji=None):
 		if len(custom_id) > 100:
 			return
+		self._payload = None
 		if "components" not in self.webhook_object:
 			self.webhook_object["components"] = [{"type": 1, "components": []}]
 		if len(self.webhook_object["components"][-1]["components"]) >= 5:
@@ -134,9 +157,11 @@ class DiscordMessage:
 		self.webhook_object["components"][-1]["components"].append({"type": 2, "custom_id": custom_id, "style": style, "label": label, "emoji": emoji})
 
 	def set_avatar(self, url):
+		self._payload = None
 		self.webhook_object["avatar_url"] = url
 
 	def set_name(self, name):
+		self._payload = None
 		self.webhook_object["username"] = name
 
 
@@ -160,8 +185,7 @@ def stack_message_list(messages: list[DiscordMessage]) -> list:
 			message_index = 0
 			while len(messages) > message_index+1:  # as long as we have messages to stack
 				if ((len(messages[message_index]) + len(messages[message_index+1])) < 2000) and not check_for_components(messages[message_index], messages[message_index+1]):  # if overall length is lower than 2000
-					messages[message_index].webhook_object["content"] = messages[message_index].webhook_object["content"] + "\n" + messages[message_index + 1].webhook_object["content"]
-					messages[message_index].length += (len(messages[message_index + 1]) + 1)
+					messages[message_index].append_content(messages[message_index + 1].webhook_object["content"])
 					messages.remove(messages[message_index + 1])
 				else:
 					message_index += 1
@@ -188,6 +212,33 @@ class StackedDiscordMessage(DiscordMessage):
 		self.finish_embed_message()
 
 
+class QueuedMessage:
+	"""Finished message waiting to be delivered, made by DiscordMessage.freeze() once formatting and stacking is done.
+	Keeps only the serialized payload, so that a large backlog of undelivered messages takes as little memory as possible."""
+	__slots__ = ("_payload", "webhook_url", "wiki", "event_type", "length")
+
+	def __init__(self, payload: bytes, webhook_url, wiki, event_type: str, length: int):
+		self._payload = payload
+		self.webhook_url = tuple(webhook_url)  # webhooks it wasn't delivered to yet
+		self.wiki = wiki
+		self.event_type = event_type
+		self.length = length
+
+	def payload(self) -> bytes:
+		return self._payload
+
+	def __repr__(self):
+		return self._payload.decode("utf-8")
+
+	def __len__(self):
+		return self.length
+
+	def delivered(self, webhook_url: str) -> bool:
+		"""Marks the message as sent to given webhook, returns True once it was sent to all of them"""
+		self.webhook_url = tuple(webhook for webhook in self.webhook_url if webhook != webhook_url)
+		return not self.webhook_url
+
+
 # Monitoring webhook functions
 async def wiki_removal_monitor(wiki_url, status):
 	await send_to_discord_webhook_monitoring(DiscordMessage("compact", "webhook/remove", content="Removing {} because {}.".format(wiki_url, status), webhook_url=[None], wiki=None))
@@ -209,46 +260,46 @@ async def send_to_discord_webhook_monitoring(data: DiscordMessage):
 	header['Content-Type'] = 'application/json'
 	async with aiohttp.ClientSession(headers=header, timeout=aiohttp.ClientTimeout(5.0)) as session:
 		try:
-			result = await session.post("https://discord.com/api/webhooks/"+settings["monitoring_webhook"], data=repr(data))
+			result = await session.post("https://discord.com/api/webhooks/"+settings["monitoring_webhook"], data=data.payload())
 		except (aiohttp.ClientConnectionError, aiohttp.ServerConnectionError):
 			logger.exception("Could not send the message to Discord")
 			return 3
 
 
-async def send_to_discord_webhook(data: DiscordMessage, webhook_url: str) -> tuple:
+async def send_to_discord_webhook(data, webhook_url: str) -> tuple:
 	"""Sends a message to webhook
 
 	:return tuple(status code for request, rate limit info (None for can send more, string for amount of seconds to wait)"""
 	async with aiohttp.ClientSession(headers=default_header, timeout=aiohttp.ClientTimeout(5.0)) as session:
 		try:
-			result = await session.post("https://discord.com/api/webhooks/"+webhook_url, data=repr(data))
+			result = await session.post("https://discord.com/api/webhooks/"+webhook_url, data=data.payload())
 			rate_limit = None if int(result.headers.get('x-ratelimit-remaining', "-1")) > 0 else result.headers.get('x-ratelimit-reset-after', None)
 		except (aiohttp.ClientConnectionError, aiohttp.ServerConnectionError, TimeoutError):
 			logger.exception("Could not send the message to Discord")
 			return 3, None
-		status = await handle_discord_http(result.status, repr(data), result, webhook_url)
+		status = await handle_discord_http(result.status, data, result, webhook_url)
 		if status == 5:
-			return 5, await result.json()
+			return 5, await result.json(loads=codec.loads)
 		else:
 			return status, rate_limit
 
 
-async def handle_discord_http(code: int, formatted_embed: str, result: aiohttp.ClientResponse, webhook_url: str):
+async def handle_discord_http(code: int, message, result: aiohttp.ClientResponse, webhook_url: str):
 	if 300 > code > 199:  # message went through
 		return 0
 	elif code == 400:  # HTTP BAD REQUEST result.status_code, data, result, header
 		logger.error(
 			"Following message has been rejected by Discord, please submit a bug on our bugtracker adding it:")
-		logger.error(formatted_embed)
+		logger.error(repr(message))
 		logger.error(await result.text())
 		return 1
 	elif code == 401 or code == 404:  # HTTP UNAUTHORIZED AND NOT FOUND
 		if result.content_type == "application/json":
-			error_details = await result.json()
+			error_details = await result.json(loads=codec.loads)
 			if error_details.get("code", -1) == 10015:
 				logger.error("Webhook URL is invalid or no longer in use, please replace it with proper one.")
-				async with db.pool().acquire() as connection:
-					await connection.execute("DELETE FROM rcgcdw WHERE webhook = $1", webhook_url)
+				await storage.remove_webhook(webhook_url)
+				target_index.remove_webhook(webhook_url)
 				await webhook_removal_monitor(webhook_url, code)
 				return 1
 			else:
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import quote
+
+from aiohttp import ClientResponseError
+
+from src.config import settings
+from src.exceptions import EnrichmentMissing
+from src.wiki_ratelimiter import RateLimiter
+
+logger = logging.getLogger("rcgcdb.enrichment")
+
+
+class EnrichmentCache:
+	"""Short-lived LRU of enrichment results shared between scans, disabled unless enrichment_cache_ttl is set.
+	Also keeps hit/miss counters of every scan's lookups."""
+	def __init__(self):
+		self.ttl: float = settings.get("enrichment_cache_ttl", 0)
+		self.size: int = settings.get("enrichment_cache_size", 1000)
+		self.entries = OrderedDict()  # key: (expiry time, result)
+		self.hits = 0
+		self.misses = 0
+		self.shared = 0  # lookups which awaited a request already in flight
+
+	def get(self, key: tuple):
+		"""Returns cached (True, result) or (False, None) if there is nothing fresh for given key"""
+		if self.ttl <= 0 or key not in self.entries:
+			return False, None
+		expiry, result = self.entries[key]
+		if expiry < time.monotonic():
+			del self.entries[key]
+			return False, None
+		self.entries.move_to_end(key)
+		return True, result
+
+	def put(self, key: tuple, result):
+		if self.ttl <= 0:
+			return
+		self.entries[key] = (time.monotonic() + self.ttl, result)
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.size:
+			self.entries.popitem(last=False)
+
+	def statistics(self) -> dict:
+		return {"hits": self.hits, "misses": self.misses, "shared": self.shared, "cached": len(self.entries)}
+
+
+enrichment_cache = EnrichmentCache()
+
+
+UPLOAD_ACTIONS = ("upload/overwrite", "upload/upload", "upload/revert")
+TITLES_PER_QUERY = 50  # API limit of titles in a single query for clients without apihighlimits
+PROFILE_COMMENT_ACTIONS = ("curseprofile/comment-created", "curseprofile/comment-replied", "curseprofile/comment-edited")
+
+
+def diff_key(change: dict) -> tuple:
+	return "compare", change.get("old_revid", 0) if change["type"] != "new" else 0, change["revid"]
+
+
+class ScanEnrichment:
+	"""Additional API data the formatters need (diffs, file information, profile comments) for a single scan of a wiki.
+
+	Every result is requested once per scan however many targets need it, callers asking for something that is being
+	requested right now await the same request."""
+	def __init__(self, wiki_url: str, wiki, rate_limiter: RateLimiter):
+		self.wiki_url = wiki_url
+		self.wiki = wiki
+		self.rate_limiter = rate_limiter
+		self.results = {}  # key: finished result or task of a request in flight
+
+	async def _lookup(self, key: tuple, request):
+		"""Returns the result for given key, calling request() only if nobody asked for it yet"""
+		if key in self.results:
+			result = self.results[key]
+			if isinstance(result, asyncio.Future):
+				if not result.done():
+					enrichment_cache.shared += 1
+				else:
+					enrichment_cache.hits += 1
+				return await asyncio.shield(result)  # a cancelled caller must not cancel the request for others
+			enrichment_cache.hits += 1
+			return result
+		found, result = enrichment_cache.get((self.wiki_url,) + key)
+		if found:
+			enrichment_cache.hits += 1
+			self.results[key] = result
+			return result
+		enrichment_cache.misses += 1
+		task = self.results[key] = asyncio.ensure_future(request())
+		try:
+			result = await asyncio.shield(task)
+		except Exception:
+			del self.results[key]
+			raise
+		self.results[key] = result
+		enrichment_cache.put((self.wiki_url,) + key, result)
+		return result
+
+	async def _request(self, url: str, *keys):
+		try:
+			return await self.wiki.safe_request(url, self.rate_limiter, *keys)
+		except ClientResponseError:
+			return None
+
+	async def diff(self, change: dict) -> Optional[str]:
+		"""Returns HTML of the diff made by an edit or a page creation"""
+		api_path = self.wiki_url + "api.php"
+		if change["type"] == "new":
+			url = "{wiki}?action=compare&format=json&fromtext=&torev={diff}&topst=1&prop=diff".format(wiki=api_path, diff=change["revid"])
+		else:
+			url = "{wiki}?action=compare&format=json&fromrev={oldrev}&torev={diff}&topst=1&prop=diff".format(wiki=api_path, diff=change["revid"], oldrev=change["old_revid"])
+		return await self._lookup(diff_key(change), lambda: self._request(url, "compare", "*"))
+
+	async def imageinfo(self, title: str) -> Optional[dict]:
+		"""Returns pages object of imageinfo query about the last 5 versions of given file"""
+		return await self._lookup(("imageinfo", title), lambda: self._request(self._imageinfo_url(title), "query", "pages"))
+
+	def _imageinfo_url(self, titles: str) -> str:
+		return "{wiki}?action=query&format=json&prop=imageinfo&list=&meta=&titles={filenames}&iiprop=timestamp%7Curl%7Carchivename&iilimit=5".format(
+			wiki=self.wiki_url + "api.php", filenames=titles)
+
+	async def _imageinfo_from_batch(self, batch: asyncio.Future, title: str, timestamps: set) -> Optional[dict]:
+		"""Picks the page of given title out of a multi-title imageinfo query, making a request just for this title if
+		the batch failed, doesn't mention it or its page is incomplete: it has fewer revisions than there are timestamps
+		or the response was cut short (continue) before the revisions of given timestamps and the ones preceding them"""
+		try:
+			response = await asyncio.shield(batch)
+		except Exception:
+			response = None
+		query = response.get("query") if isinstance(response, dict) else None
+		if query is not None:
+			normalized = {entry["from"]: entry["to"] for entry in query.get("normalized", ())}
+			name = normalized.get(title, title)
+			wanted = {timestamp for timestamp in timestamps if timestamp is not None}
+			for page_id, page in query.get("pages", {}).items():
+				if page.get("title") != name:
+					continue
+				if "missing" in page or int(page_id) < 0:
+					return {"-1": page}  # keyed as in a single title response
+				revisions = [revision.get("timestamp") for revision in page.get("imageinfo", ())]
+				if len(revisions) >= len(wanted) and ("continue" not in response or
+				                                      (wanted <= set(revisions) and revisions[-1] not in wanted)):  # overwrites need the version before too
+					return {page_id: page}
+				break
+		logger.debug("Batched imageinfo of {} on {} was incomplete, requesting it separately.".format(title, self.wiki_url))
+		return await self._request(self._imageinfo_url(title), "query", "pages")
+
+	async def imageinfo_batch(self, titles: dict) -> list:
+		"""Requests imageinfo of many files with as few queries as possible, up to TITLES_PER_QUERY titles each.
+
+		:param titles: dict of title: set of upload timestamps the formatters will look for"""
+		needed = [title for title in titles if ("imageinfo", title) not in self.results and not enrichment_cache.get((self.wiki_url, "imageinfo", title))[0]]
+		lookups = []
+		for start in range(0, len(needed), TITLES_PER_QUERY):
+			chunk = needed[start:start + TITLES_PER_QUERY]
+			# the whole response, continue next to query tells that some pages may be incomplete
+			batch = asyncio.ensure_future(self._request(self._imageinfo_url(quote("|".join(chunk), safe=""))))
+			for title in chunk:
+				lookups.append(self._lookup(("imageinfo", title), lambda title=title, batch=batch: self._imageinfo_from_batch(batch, title, titles[title])))
+		return await asyncio.gather(*lookups, return_exceptions=True)
+
+	async def comment(self, comment_id) -> str:
+		"""Returns raw text of a CurseProfile comment, empty when it couldn't be retrieved"""
+		return await self._lookup(("comment", comment_id), lambda: self.wiki.pull_comment(comment_id, self.wiki_url + "api.php", self.rate_limiter))
+
+	def snapshot(self) -> dict:
+		"""Returns results finished so far, for rendering somewhere this object can't go"""
+		return {key: result for key, result in self.results.items() if not isinstance(result, asyncio.Future)}
+
+	async def prefetch(self, events: list, targets) -> int:
+		"""Requests everything the formatters will need for given events and (lang, display, buttons) targets at once,
+		so that rendering doesn't wait for the requests one by one. Requests are still paced by the rate limiter.
+
+		:returns number of requested lookups"""
+		displays = {target[1] for target in targets}
+		lookups = []
+		files = {}
+		for event in events:
+			if event.action in ("edit", "new"):
+				if 3 in displays:
+					lookups.append(self.diff(event.change))
+			elif event.action in UPLOAD_ACTIONS:
+				if any(display > 0 for display in displays):
+					files.setdefault(event.change["title"], set()).add(event.change.get("logparams", {}).get("img_timestamp"))
+			elif event.action in PROFILE_COMMENT_ACTIONS:
+				if 3 in displays:
+					lookups.append(self.comment(event.change["logparams"]["4:comment_id"]))
+		requested = len(lookups) + len(files)
+		if files:
+			lookups.append(self.imageinfo_batch(files))
+		for result in await asyncio.gather(*lookups, return_exceptions=True):
+			if isinstance(result, Exception):
+				logger.warning("Prefetching enrichment data of {} failed: {}".format(self.wiki_url, repr(result)))
+		return requested
+
+
+class ResolvedEnrichment:
+	"""Serves formatters with results of a ScanEnrichment taken by snapshot(), without making any requests.
+	Lookups which weren't done beforehand raise EnrichmentMissing."""
+	def __init__(self, results: dict):
+		self.results = results
+
+	def _get(self, key: tuple):
+		try:
+			return self.results[key]
+		except KeyError:
+			raise EnrichmentMissing(key)
+
+	async def diff(self, change: dict) -> Optional[str]:
+		return self._get(diff_key(change))
+
+	async def imageinfo(self, title: str) -> Optional[dict]:
+		return self._get(("imageinfo", title))
+
+	async def comment(self, comment_id) -> str:
+		return self._get(("comment", comment_id))
@@ -19,8 +19,11 @@ class OtherWikiError(Exception):
 class QueueEmpty(Exception):
 	pass
 
-class ListFull(Exception):
+class EmbedListFull(Exception):
 	pass
 
-class EmbedListFull(Exception):
-	pass
\ No newline at end of file
+class ResponseTooLarge(Exception):
+	pass
+
+class EnrichmentMissing(Exception):
+	pass
@@ -2,6 +2,7 @@ import datetime, logging
 import json
 from urllib.parse import quote_plus
 
+from src import codec
 from src.config import settings
 from src.misc import link_formatter, create_article_path, escape_formatting
 from src.discord import DiscordMessage
@@ -200,7 +201,7 @@ class DiscussionsFromHellParser:
 	def __init__(self, post, wiki):
 		self.post = post
 		self.wiki = wiki
-		self.jsonModal = json.loads(post.get("jsonModel", "{}"))
+		self.jsonModal = codec.loads(post.get("jsonModel", "{}"))
 		self.markdown_text = ""
 		self.item_num = 1
 		self.image_last = None
@@ -0,0 +1,52 @@
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger("rcgcdw.formatter_registry")
+
+
+class FormattingState:
+	"""Everything a formatter of a single action works with while rendering a change for one target. Handlers read
+	what they need and store their results (link, parsed_comment of embeds) back in it."""
+	def __init__(self, action: str, parsed_comment, categories, enrichment, message_target: tuple, context):
+		self.action = action
+		self.parsed_comment = parsed_comment
+		self.categories = categories
+		self.enrichment = enrichment
+		self.message_target = message_target
+		self.context = context
+		self.action_buttons = message_target[0][2].split('|') if message_target[0][2] is not None else []
+		self.author = None
+		self.author_url = None
+		self.message_buttons = []  # buttons of compact messages, added once the message is created
+		self.embed = None
+		self.link = None
+
+
+class ActionRegistry:
+	"""Maps action identifiers (edit, new, logtype/logaction) to formatter functions of one display mode.
+
+	Handlers are coroutines taking (state: FormattingState, change: dict, _, ngettext), compact ones return content
+	of the message. Extensions can register their own handlers or replace the built-in ones the same way."""
+	def __init__(self, mode: str):
+		self.mode = mode
+		self.handlers = {}
+
+	def register(self, *actions: str) -> Callable:
+		def decorator(handler: Callable) -> Callable:
+			for action in actions:
+				if action in self.handlers:
+					logger.debug("Replacing {} formatter of {} with {}.".format(self.mode, action, handler.__name__))
+				self.handlers[action] = handler
+			return handler
+		return decorator
+
+	def get(self, action: str) -> Optional[Callable]:
+		"""Returns handler of given action or None for actions without any, which the formatters treat as unknown"""
+		return self.handlers.get(action)
+
+	def __contains__(self, action: str) -> bool:
+		return action in self.handlers
+
+
+compact_actions = ActionRegistry("compact")
+embed_actions = ActionRegistry("embed")
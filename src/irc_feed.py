@@ -1,10 +1,11 @@
 import asyncio
 import re
 import irc.client_aio
-import json
 import logging
 from urllib.parse import urlparse, quote
 
+from src import codec
+
 logger = logging.getLogger("rcgcdw.irc_feed")
 
 
@@ -60,8 +61,8 @@ class AioIRCCat(irc.client_aio.AioSimpleIRCClient):
 
 	def parse_discussion_message(self, message: str):
 		try:
-			post = json.loads(message)
-		except json.JSONDecodeError:
+			post = codec.loads(message)
+		except codec.JSONDecodeError:
 			logger.warning("Seems like we have invalid JSON in Discussions part, message: {}".format(message))
 			return
 		if post.get('action', 'unknown') != "deleted":  # ignore deletion events
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Callable, Iterator, Optional
+
+from src.config import settings
+
+logger = logging.getLogger("rcgcdb.journal")
+
+
+class CheckpointJournal:
+	"""Append-only local file of checkpoints (wiki, feeds, last seen id, timestamp), one JSON array per line.
+
+	Checkpoints are buffered and written with a single fsync for everyone waiting in sync(), so progress is durable
+	long before it reaches Postgres. The journal is replayed at startup and rewritten with only the checkpoints not yet
+	saved in the database once it grows over checkpoint_journal_compact_size bytes."""
+	def __init__(self, path: Optional[str]):
+		self.path = path
+		self.buffer = []
+		self.lock: Optional[asyncio.Lock] = None  # created on first use, within the running event loop
+		self.size = os.path.getsize(path) if path and os.path.exists(path) else 0
+		self.torn = self.size > 0 and self._last_byte() != b"\n"  # the last write was interrupted by a crash
+		self.compact_size = settings.get("checkpoint_journal_compact_size", 1048576)
+
+	@property
+	def enabled(self) -> bool:
+		return bool(self.path)
+
+	def append(self, wiki: str, feeds: bool, value):
+		if self.enabled:
+			self.buffer.append(json.dumps([wiki, feeds, value, round(time.time(), 3)]) + "\n")
+
+	def _last_byte(self) -> bytes:
+		with open(self.path, "rb") as journal_file:
+			journal_file.seek(-1, os.SEEK_END)
+			return journal_file.read(1)
+
+	def _write(self, data: str):
+		if self.torn:  # don't glue the first new record to the broken one
+			data = "\n" + data
+			self.torn = False
+		with open(self.path, "a", encoding="utf-8") as journal_file:
+			journal_file.write(data)
+			journal_file.flush()
+			os.fsync(journal_file.fileno())
+
+	def _rewrite(self, data: str):
+		temp_path = self.path + ".tmp"
+		with open(temp_path, "w", encoding="utf-8") as journal_file:
+			journal_file.write(data)
+			journal_file.flush()
+			os.fsync(journal_file.fileno())
+		os.replace(temp_path, self.path)
+
+	async def sync(self):
+		"""Writes buffered checkpoints to the disk, callers arriving during a write share the next one"""
+		if not self.buffer:
+			return
+		if self.lock is None:
+			self.lock = asyncio.Lock()
+		async with self.lock:
+			if not self.buffer:  # written by whoever had the lock before us
+				return
+			data, self.buffer = "".join(self.buffer), []
+			await asyncio.get_event_loop().run_in_executor(None, self._write, data)
+			self.size += len(data)
+
+	async def compact(self, pending: Callable[[], dict], force: bool = False):
+		"""Rewrites the journal with checkpoints returned by pending ((wiki, feeds): value dict), which have to be all
+		checkpoints not saved in the database yet. Unless forced, only once it grew over checkpoint_journal_compact_size"""
+		if not self.enabled or (self.size < self.compact_size and not force):
+			return
+		if self.lock is None:
+			self.lock = asyncio.Lock()
+		async with self.lock:
+			now = round(time.time(), 3)
+			data = "".join(json.dumps([wiki, feeds, value, now]) + "\n" for (wiki, feeds), value in pending().items())
+			self.buffer = []  # every buffered checkpoint is either in pending or already in the database
+			await asyncio.get_event_loop().run_in_executor(None, self._rewrite, data)
+			self.torn = False
+			logger.debug("Compacted checkpoint journal from {} to {} bytes.".format(self.size, len(data)))
+			self.size = len(data)
+
+	def replay(self) -> Iterator[tuple]:
+		"""Yields (wiki, feeds, value) of every checkpoint in the journal, a line torn by a crash is skipped"""
+		if not self.enabled or not os.path.exists(self.path):
+			return
+		with open(self.path, encoding="utf-8") as journal_file:
+			for line in journal_file:
+				try:
+					wiki, feeds, value, _timestamp = json.loads(line)
+				except ValueError:
+					logger.warning("Skipping a damaged checkpoint journal entry: {}".format(line[0:200]))
+					continue
+				yield wiki, feeds, value
+
+
+journal = CheckpointJournal(settings.get("checkpoint_journal"))
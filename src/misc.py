@@ -1,23 +1,80 @@
+from html import unescape
 from html.parser import HTMLParser
-import base64, re
+import base64, re, json
 
 import logging
 from urllib.parse import urlparse, urlunparse
+from src import codec
 from src.i18n import langs
 
 logger = logging.getLogger("rcgcdw.misc")
 
+json_decoder = json.JSONDecoder()
+json_whitespace = re.compile(r"[ \t\n\r]*")
+recent_changes_list = re.compile(r'"recentchanges"[ \t\n\r]*:[ \t\n\r]*\[')
 
-def get_paths(wiki: str, request) -> tuple:
+
+def get_paths(wiki: str, article_path: str) -> tuple:
 	"""Prepares wiki paths for the functions"""
 	parsed_url = urlparse(wiki)
 	WIKI_API_PATH = wiki + "api.php"
 	WIKI_SCRIPT_PATH = wiki
-	WIKI_ARTICLE_PATH = urlunparse((*parsed_url[0:2], "", "", "", "")) + request["query"]["general"]["articlepath"]
+	WIKI_ARTICLE_PATH = urlunparse((*parsed_url[0:2], "", "", "", "")) + article_path
 	WIKI_JUST_DOMAIN = urlunparse((*parsed_url[0:2], "", "", "", ""))
 	return WIKI_API_PATH, WIKI_SCRIPT_PATH, WIKI_ARTICLE_PATH, WIKI_JUST_DOMAIN
 
 
+class RenderingContext:
+	"""Everything the formatters need to know about a wiki, built once per metadata refresh instead of per change and target"""
+	def __init__(self, wiki: str, article_path: str, namespaces: dict, tags: dict):
+		self.paths = get_paths(wiki, article_path)
+		self.api_path, self.script_path, self.article_path, self.just_domain = self.paths
+		self.button_prefix = "rc_" + self.script_path[len(self.just_domain):]
+		self.namespaces = namespaces or {}
+		self.tags = tags or {}  # tag name: display name as plain text or None for hidden tags
+		if self.article_path.count("$1") == 1:
+			self._article_prefix, self._article_suffix = self.article_path.split("$1")
+		else:
+			self._article_prefix = None
+
+	def article_url(self, article: str) -> str:
+		"""Same as create_article_path for this wiki's article path"""
+		if self._article_prefix is None:
+			return create_article_path(article, self.article_path)
+		return self._article_prefix + article.replace(" ", "_").replace("%", "%25").replace("\\", "%5C").replace("?", "%3F").replace("&", "%26") + self._article_suffix
+
+
+def parse_recent_changes(body: str, rc_active) -> tuple:
+	"""Decodes MediaWiki API response decoding the recentchanges list one change at a time, so that changes which were
+	already processed are dropped right away instead of staying in memory with the rest of the response.
+
+	:returns tuple(response with only changes newer than rc_active in ["query"]["recentchanges"], amount of dropped
+	changes, timestamp of the newest change in the response)"""
+	rc_list = recent_changes_list.search(body)
+	if rc_list is None:  # error responses and such
+		return codec.loads(body), 0, None
+	start, index = rc_list.span()
+	rc_active = rc_active or 0
+	changes = []
+	skipped = 0
+	newest_timestamp = None
+	index = json_whitespace.match(body, index).end()
+	while body[index] != "]":
+		change, index = json_decoder.raw_decode(body, index)
+		if newest_timestamp is None or change["timestamp"] > newest_timestamp:
+			newest_timestamp = change["timestamp"]
+		if change["rcid"] > rc_active:
+			changes.append(change)
+		else:
+			skipped += 1
+		index = json_whitespace.match(body, index).end()
+		if body[index] == ",":
+			index = json_whitespace.match(body, index + 1).end()
+	response = codec.loads(body[:start] + '"recentchanges":[]' + body[index + 1:])
+	response["query"]["recentchanges"] = changes
+	return response, skipped, newest_timestamp
+
+
 def get_domain(url: str) -> str:
 	"""Get domain of given URL"""
 	parsed_url = urlparse(url)
@@ -25,50 +82,88 @@ def get_domain(url: str) -> str:
 
 
 class LinkParser(HTMLParser):
-
-	new_string = ""
-	recent_href = ""
-	WIKI_JUST_DOMAIN = ""
+	"""HTMLParser based conversion of links to Markdown, handles every input parse_link's fast path gives up on.
+	Keeps its state per instance so that a new one has to be used for every text."""
+	def __init__(self, domain: str):
+		super().__init__()
+		self.WIKI_JUST_DOMAIN = domain
+		self.new_string = []
+		self.recent_href = ""
 
 	def handle_starttag(self, tag, attrs):
 		for attr in attrs:
 			if attr[0] == 'href':
-				self.recent_href = attr[1]
-				if self.recent_href.startswith("//"):
-					self.recent_href = "https:{rest}".format(rest=self.recent_href)
-				elif not self.recent_href.startswith("http"):
-					self.recent_href = self.WIKI_JUST_DOMAIN + self.recent_href
-				self.recent_href = self.recent_href.replace(")", "\\)")
+				self.recent_href = absolute_href(self.WIKI_JUST_DOMAIN, attr[1])
 			elif attr[0] == 'data-uncrawlable-url':
-				self.recent_href = attr[1].encode('ascii')
-				self.recent_href = base64.b64decode(self.recent_href)
-				self.recent_href = self.WIKI_JUST_DOMAIN + self.recent_href.decode('ascii')
+				self.recent_href = uncrawlable_href(self.WIKI_JUST_DOMAIN, attr[1])
 
 	def handle_data(self, data):
 		if self.recent_href:
-			self.new_string = self.new_string + "[{}](<{}>)".format(escape_formatting(data), self.recent_href)
+			self.new_string.append("[{}](<{}>)".format(escape_formatting(data), self.recent_href))
 			self.recent_href = ""
 		else:
-			self.new_string = self.new_string + escape_formatting(data)
+			self.new_string.append(escape_formatting(data))
 
 	def handle_comment(self, data):
-		self.new_string = self.new_string + escape_formatting(data)
+		self.new_string.append(escape_formatting(data))
+
 
-	def handle_endtag(self, tag):
-		# logger.debug(self.new_string)
-		pass
+def absolute_href(domain: str, href: str) -> str:
+	if href.startswith("//"):
+		href = "https:{rest}".format(rest=href)
+	elif not href.startswith("http"):
+		href = domain + href
+	return href.replace(")", "\\)")
 
 
-LinkParse = LinkParser()
+def uncrawlable_href(domain: str, encoded: str) -> str:
+	return domain + base64.b64decode(encoded.encode('ascii')).decode('ascii')
+
+
+tag_pattern = re.compile(r"""<(/?)([a-zA-Z][a-zA-Z0-9-]*)((?:\s+[a-zA-Z_:][-a-zA-Z0-9_:.]*\s*=\s*(?:"[^"]*"|'[^']*'))*)\s*(/?)>""")
+attribute_pattern = re.compile(r"""([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+raw_text_tags = {"script", "style", "textarea", "title", "xmp", "iframe", "noembed", "noframes", "noscript", "plaintext"}
+
 
 def parse_link(domain: str, to_parse: str) -> str:
-	"""Because I have strange issues using the LinkParser class myself, this is a helper function
-	to utilize the LinkParser properly"""
-	LinkParse.WIKI_JUST_DOMAIN = domain
-	LinkParse.new_string = ""
-	LinkParse.feed(to_parse)
-	LinkParse.recent_href = ""
-	return LinkParse.new_string
+	"""Converts HTML of a parsed comment to Markdown, with links in the [text](<url>) form and everything else escaped.
+
+	Plain text and well-formed tags, which is what MediaWiki generates, are handled by a single pass over the string;
+	anything else (HTML comments, stray "<" and so on) is left to a new LinkParser."""
+	output = []
+	recent_href = ""
+	position = 0
+	length = len(to_parse)
+	while position < length:
+		tag_start = to_parse.find("<", position)
+		if tag_start == -1:
+			tag_start = length
+		if tag_start > position:
+			data = escape_formatting(unescape(to_parse[position:tag_start]))
+			if recent_href:
+				output.append("[{}](<{}>)".format(data, recent_href))
+				recent_href = ""
+			else:
+				output.append(data)
+			if tag_start == length:
+				break
+		tag = tag_pattern.match(to_parse, tag_start)
+		if tag is not None:
+			closing, name, attributes, self_closing = tag.groups()
+		if tag is None or name.lower() in raw_text_tags or (closing and (attributes or self_closing)):
+			parser = LinkParser(domain)
+			parser.feed(to_parse)
+			parser.close()
+			return "".join(parser.new_string)
+		if attributes:
+			for attribute in attribute_pattern.finditer(attributes):
+				name = attribute.group(1).lower()
+				if name == "href":
+					recent_href = absolute_href(domain, unescape(attribute.group(2) if attribute.group(2) is not None else attribute.group(3)))
+				elif name == "data-uncrawlable-url":
+					recent_href = uncrawlable_href(domain, unescape(attribute.group(2) if attribute.group(2) is not None else attribute.group(3)))
+		position = tag.end()
+	return "".join(output)
 
 
 def link_formatter(link: str) -> str:
@@ -76,9 +171,12 @@ def link_formatter(link: str) -> str:
 	return "<" + re.sub(r"([)])", "\\\\\\1", link).replace(" ", "_") + ">"
 
 
+formatting_escapes = str.maketrans({character: "\\" + character for character in "`_*~:<>{}@/|#-.\\[]()"})
+
+
 def escape_formatting(data: str) -> str:
 	"""Escape Discord formatting"""
-	return re.sub(r"([`_*~:<>{}@/|#\-\.\\\[\]\(\)])", "\\\\\\1", data, 0) if data is not None else ""
+	return data.translate(formatting_escapes) if data is not None else ""
 
 
 def create_article_path(article: str, WIKI_ARTICLE_PATH: str) -> str:
@@ -118,50 +216,78 @@ def class_searcher(attribs: list) -> str:
 
 
 class ContentParser(HTMLParser):
+	"""Summarizes a compare API diff into up to 1000 characters of added (small_prev_ins) and removed (small_prev_del)
+	text. Use summarize(), which stops reading the diff once nothing more can make it into either summary."""
 	current_tag = ""
-	last_ins = None
-	last_del = None
 	empty = False
-	small_prev_ins = ""
-	small_prev_del = ""
 
 	def __init__(self, lang):
 		super().__init__()
 		self.more = langs[lang]["misc"].gettext("\n__And more__")
 		self.ins_length = len(self.more)
 		self.del_length = len(self.more)
+		self.last_ins = None  # list of parts of the current row or None outside of an added line
+		self.last_del = None
+		self.prev_ins = []
+		self.prev_del = []
+		self.small_prev_ins = ""
+		self.small_prev_del = ""
+
+	def summarize(self, diff: str):
+		"""Reads the diff row by row until both summaries are complete and sets small_prev_ins and small_prev_del"""
+		last_added = diff.rfind("diff-addedline")
+		last_deleted = diff.rfind("diff-deletedline")
+		position = 0
+		while True:
+			row_end = diff.find("</tr>", position)
+			if row_end == -1:
+				self.feed(diff[position:])
+				break
+			row_end += 5
+			row = diff[position:row_end]
+			position = row_end
+			if self.last_ins is None and self.last_del is None and "-addedline" not in row and "-deletedline" not in row \
+					and "<ins" not in row and "<del" not in row:
+				continue  # context lines leave the summaries as they are
+			self.feed(row)
+			if self.last_ins is None and self.last_del is None and (self.ins_length > 1000 or row_end > last_added) and \
+					(self.del_length > 1000 or row_end > last_deleted):
+				break  # no more changed lines or no room left for them
+		self.small_prev_ins = "".join(self.prev_ins)
+		self.small_prev_del = "".join(self.prev_del)
 
 	def handle_starttag(self, tagname, attribs):
-		classes = class_searcher(attribs).split(' ')
 		if tagname == "ins" or tagname == "del":
 			self.current_tag = tagname
-		if tagname == "td" and "diff-addedline" in classes and self.ins_length <= 1000:
-			self.current_tag = "tda"
-			self.last_ins = ""
-		if tagname == "td" and "diff-deletedline" in classes and self.del_length <= 1000:
-			self.current_tag = "tdd"
-			self.last_del = ""
-		if tagname == "td" and "diff-empty" in classes:
-			self.empty = True
+		elif tagname == "td":
+			classes = class_searcher(attribs).split(' ')
+			if "diff-addedline" in classes and self.ins_length <= 1000:
+				self.current_tag = "tda"
+				self.last_ins = []
+			if "diff-deletedline" in classes and self.del_length <= 1000:
+				self.current_tag = "tdd"
+				self.last_del = []
+			if "diff-empty" in classes:
+				self.empty = True
 
 	def handle_data(self, data):
 		data = escape_formatting(data)
 		if self.current_tag == "ins" and self.ins_length <= 1000:
-			self.ins_length += len("**" + data + "**")
+			self.ins_length += len(data) + 4
 			if self.ins_length <= 1000:
-				self.last_ins = self.last_ins + "**" + data + "**"
-		if self.current_tag == "del" and self.del_length <= 1000:
-			self.del_length += len("~~" + data + "~~")
+				self.last_ins.append("**" + data + "**")
+		elif self.current_tag == "del" and self.del_length <= 1000:
+			self.del_length += len(data) + 4
 			if self.del_length <= 1000:
-				self.last_del = self.last_del + "~~" + data + "~~"
-		if self.current_tag == "tda" and self.ins_length <= 1000:
+				self.last_del.append("~~" + data + "~~")
+		elif self.current_tag == "tda" and self.ins_length <= 1000:
 			self.ins_length += len(data)
 			if self.ins_length <= 1000:
-				self.last_ins = self.last_ins + data
-		if self.current_tag == "tdd" and self.del_length <= 1000:
+				self.last_ins.append(data)
+		elif self.current_tag == "tdd" and self.del_length <= 1000:
 			self.del_length += len(data)
 			if self.del_length <= 1000:
-				self.last_del = self.last_del + data
+				self.last_del.append(data)
 
 	def handle_endtag(self, tagname):
 		self.current_tag = ""
@@ -172,20 +298,22 @@ class ContentParser(HTMLParser):
 		elif tagname == "tr":
 			if self.last_ins is not None:
 				self.ins_length += 1
-				if self.empty and not self.last_ins.isspace() and "**" not in self.last_ins:
+				last_ins = "".join(self.last_ins)
+				if self.empty and not last_ins.isspace() and "**" not in last_ins:
 					self.ins_length += 4
-					self.last_ins = "**" + self.last_ins + "**"
-				self.small_prev_ins = self.small_prev_ins + "\n" + self.last_ins
+					last_ins = "**" + last_ins + "**"
+				self.prev_ins.append("\n" + last_ins)
 				if self.ins_length > 1000:
-					self.small_prev_ins = self.small_prev_ins + self.more
+					self.prev_ins.append(self.more)
 				self.last_ins = None
 			if self.last_del is not None:
 				self.del_length += 1
-				if self.empty and not self.last_del.isspace() and "~~" not in self.last_del:
+				last_del = "".join(self.last_del)
+				if self.empty and not last_del.isspace() and "~~" not in last_del:
 					self.del_length += 4
-					self.last_del = "~~" + self.last_del + "~~"
-				self.small_prev_del = self.small_prev_del + "\n" + self.last_del
+					last_del = "~~" + last_del + "~~"
+				self.prev_del.append("\n" + last_del)
 				if self.del_length > 1000:
-					self.small_prev_del = self.small_prev_del + self.more
+					self.prev_del.append(self.more)
 				self.last_del = None
 			self.empty = False
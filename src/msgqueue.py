@@ -1,5 +1,5 @@
 import asyncio, logging, aiohttp
-from src.discord import send_to_discord_webhook, DiscordMessage, StackedDiscordMessage
+from src.discord import send_to_discord_webhook, DiscordMessage, StackedDiscordMessage, QueuedMessage
 from src.config import settings
 from src.exceptions import EmbedListFull
 from collections import defaultdict
@@ -23,7 +23,7 @@ class MessageQueue:
 	def clear(self):
 		self._queue.clear()
 
-	def add_message(self, message):
+	def add_message(self, message: QueuedMessage):
 		self._queue.append(message)
 		logger.debug("Adding new message")
 	#
@@ -42,8 +42,8 @@ class MessageQueue:
 		webhooks at the same time avoiding ratelimits per Discord webhook route."""
 		message_dict = defaultdict(list)
 		for msg in self._queue:
-			if not isinstance(msg.webhook_url, list):
-				raise TypeError('msg.webhook_url in _queue is not a list')
+			if not isinstance(msg.webhook_url, tuple):
+				raise TypeError('msg.webhook_url in _queue is not a tuple')
 			for webhook in msg.webhook_url:
 				message_dict[webhook].append(msg)  # defaultdict{"dadibadyvbdmadgqueh23/dihjd8agdandashd": [DiscordMessage, DiscordMessage]}
 		return message_dict.items()  # dict_items([('daosdkosakda/adkahfwegr34', [DiscordMessage]), ('daosdkosakda/adkahfwegr33', [DiscordMessage, DiscordMessage])])
@@ -57,9 +57,7 @@ class MessageQueue:
 			if status[0] < 2:
 				logger.debug("Sending message succeeded")
 				try:
-					if len(msg.webhook_url) > 1:
-						msg.webhook_url.remove(webhook_url)
-					else:
+					if msg.delivered(webhook_url):
 						self._queue.remove(msg)
 				except ValueError:
 					#  For the love of god I cannot figure why can it return ValueError: list.remove(x): x not in list, however considering it's not in the list, somehow, anymore we can just not care about it I guess
@@ -95,8 +93,8 @@ class MessageQueue:
 messagequeue = MessageQueue()
 
 
-async def send_to_discord(msg):
-	messagequeue.add_message(msg)
+async def send_to_discord(msg: DiscordMessage):
+	messagequeue.add_message(msg.freeze())
 	# webhooks = msg.webhook_url.copy()
 	# for webhook in webhooks:
 	# 	msg.webhook_url = [webhook]  # Doing it just so it doesn't store reference but value
@@ -1,29 +1,73 @@
+import asyncio
 import logging
-from src.database import db
+import time
+
+from src.config import settings
+from src.journal import journal
+from src import storage
 
 logger = logging.getLogger("rcgcdb.queue_handler")
 
 
 class UpdateDB:
+	"""Collects checkpoints (last seen rcid or discussion post id) of wikis and writes them in batches.
+
+	Only the highest checkpoint of every wiki is kept, they are written with a single statement per kind once
+	checkpoint_batch_size of them gathered or checkpoint_flush_interval seconds passed since the last write.
+	With checkpoint_journal enabled every checkpoint is first made durable in the local journal, so the database is
+	updated lazily and its outages only delay the writes."""
 	def __init__(self):
-		self.updated = []
+		self.updated = {}  # (wiki, feeds): highest checkpoint
+		self.last_flush = time.monotonic()
+		self.batch_size = settings.get("checkpoint_batch_size", 500)
+		self.flush_interval = settings.get("checkpoint_flush_interval", 5.0)
+		self.flush_lock = None
 
 	def add(self, wiki, rc_id, feeds=None):
-		self.updated.append((wiki, rc_id, feeds))
+		key = (wiki, feeds is not None)
+		if key not in self.updated or int(rc_id) > int(self.updated[key]):
+			self.updated[key] = rc_id
+			journal.append(wiki, feeds is not None, rc_id)
 
 	def clear_list(self):
 		self.updated.clear()
 
 	async def update_db(self):
-		async with db.pool().acquire() as connection:
-			async with connection.transaction():
-				for update in self.updated:
-					if update[2] is None:
-						sql = "UPDATE rcgcdw SET rcid = $2 WHERE wiki = $1 AND ( rcid != -1 OR rcid IS NULL )"
-					else:
-						sql = "UPDATE rcgcdw SET postid = $2 WHERE wiki = $1 AND ( postid != '-1' OR postid IS NULL )"
-					await connection.execute(sql, update[0], update[1])
-				self.clear_list()
+		"""Makes the checkpoints durable and writes them to the database if the batch is big or old enough"""
+		await journal.sync()
+		if self.flush_lock is not None and self.flush_lock.locked():
+			return  # someone is writing already
+		if len(self.updated) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+			try:
+				await self.flush()
+			except asyncio.CancelledError:
+				raise
+			except Exception:
+				if not journal.enabled:
+					raise
+				logger.exception("Could not save checkpoints in the database, they are kept in the journal for now.")
+
+	async def flush(self):
+		"""Writes all collected checkpoints right away"""
+		await journal.sync()
+		if self.flush_lock is None:
+			self.flush_lock = asyncio.Lock()
+		async with self.flush_lock:
+			self.last_flush = time.monotonic()
+			if not self.updated:
+				return
+			pending, self.updated = self.updated, {}  # scans finishing in the meantime start a new batch
+			try:
+				await storage.save_checkpoints({wiki: value for (wiki, feeds), value in pending.items() if not feeds},
+				                               {wiki: value for (wiki, feeds), value in pending.items() if feeds})
+			except:
+				for (wiki, feeds), value in pending.items():  # keep them for the next try
+					key = (wiki, feeds)
+					if key not in self.updated or int(value) > int(self.updated[key]):
+						self.updated[key] = value
+				raise
+			logger.debug("Saved {} checkpoints.".format(len(pending)))
+			await journal.compact(lambda: self.updated)
 
 
 DBHandler = UpdateDB()
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import multiprocessing
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from src.config import settings
+from src.enrichment import ResolvedEnrichment, ScanEnrichment
+from src.exceptions import EnrichmentMissing
+from src.misc import RenderingContext
+from src.wiki import render_change
+
+logger = logging.getLogger("rcgcdb.render_pool")
+
+
+class RenderedWiki:
+	"""The part of Wiki render_change needs, sent to worker processes instead of the whole object"""
+	def __init__(self, context: RenderingContext):
+		self.context = context
+
+
+def run_ready(coroutine):
+	"""Runs a coroutine which never has to wait for anything (formatters with a ResolvedEnrichment) without an event loop"""
+	try:
+		coroutine.send(None)
+	except StopIteration as result:
+		return result.value
+	coroutine.close()
+	raise RuntimeError("Rendering tried to wait for I/O in a worker process")
+
+
+def render_batch(events: list, context: RenderingContext, targets: list, enrichment_results: dict) -> list:
+	"""Renders every event for every target, runs in a worker process.
+
+	:returns list of messages (or None for changes which aren't sent) for every event and target in that order;
+	EnrichmentMissing when the formatters needed something that wasn't prefetched and a formatted traceback for other
+	exceptions instead of the message"""
+	wiki, enrichment = RenderedWiki(context), ResolvedEnrichment(enrichment_results)
+	rendered = []
+	for event in events:
+		for target in targets:
+			try:
+				rendered.append(run_ready(render_change(event, wiki, target, enrichment)))
+			except EnrichmentMissing as missing:
+				rendered.append(missing)
+			except Exception:
+				rendered.append(traceback.format_exc())
+	return rendered
+
+
+class RenderPool:
+	"""Optional pool of processes rendering large scans, so that formatting doesn't block the event loop.
+
+	Enabled with render_processes > 0, scans with fewer than render_offload_threshold messages to render (events times
+	targets) stay in the main process since sending them to a worker costs more than rendering them."""
+	def __init__(self):
+		self.processes: int = settings.get("render_processes", 0)
+		self.threshold: int = settings.get("render_offload_threshold", 200)
+		self.executor: Optional[ProcessPoolExecutor] = None
+
+	def should_offload(self, renders: int) -> bool:
+		return self.processes > 0 and renders >= self.threshold
+
+	def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+		if self.executor is None:
+			try:
+				# workers are forked, spawning them would import start.py and run another bot
+				self.executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("fork"))
+			except ValueError:
+				logger.warning("Render processes need the fork start method which isn't available here, rendering in the main process.")
+				self.processes = 0
+		return self.executor
+
+	async def render(self, events: list, context: RenderingContext, targets: list, enrichment: ScanEnrichment) -> Optional[list]:
+		"""Renders events in a worker process, returns render_batch's result or None if the pool is not usable"""
+		executor = self._get_executor()
+		if executor is None:
+			return None
+		try:
+			return await asyncio.get_event_loop().run_in_executor(executor, render_batch, events, context, targets, enrichment.snapshot())
+		except BrokenProcessPool:
+			logger.exception("A render process died, starting a new pool.")
+			self.executor = None
+		except Exception:  # most likely something that can't be pickled
+			logger.exception("Could not render in a render process.")
+		return None
+
+	def shutdown(self):
+		if self.executor is not None:
+			self.executor.shutdown(wait=False)
+			self.executor = None
+
+
+render_pool = RenderPool()
@@ -0,0 +1,112 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger("rcgcdb.scheduler")
+
+
+class PollScheduler:
+	"""Priority queue of wikis of a single domain group ordered by the time they are due to be polled at.
+
+	Wikis are always served in order of their due time, so when the group is behind schedule the wiki that waits
+	the longest goes first and busy wikis can't starve the idle ones. A wiki taken from the schedule stays a member
+	of it (without an entry in the heap) until it's rescheduled after the poll, adding it back while the poll is still
+	running after a removal only brings the membership back, so that it's never polled twice at once."""
+	def __init__(self):
+		self._heap = []
+		self._entries = {}  # wiki url: heap entry or None when the wiki is being polled right now
+		self._poked = set()  # wikis that got an update notification while being polled
+		self._in_flight = set()  # wikis taken by take_next and not rescheduled yet, even if removed in the meantime
+		self._counter = itertools.count()
+		self._changed = asyncio.Event()
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __contains__(self, wiki_url):
+		return wiki_url in self._entries
+
+	def __iter__(self):
+		return iter(self._entries)
+
+	def _push(self, wiki_url: str, due: float):
+		entry = [due, next(self._counter), wiki_url]
+		self._entries[wiki_url] = entry
+		heapq.heappush(self._heap, entry)
+		if self._heap[0] is entry:  # wake up the waiter since the first due time has changed
+			self._changed.set()
+
+	def _discard(self, wiki_url: str):
+		entry = self._entries.get(wiki_url)
+		if entry is not None:
+			entry[2] = None  # lazy deletion, removed from the heap when it reaches the top
+
+	def add(self, wiki_url: str, delay: float = 0.0):
+		"""Adds a new wiki to the schedule, does nothing if it's already there"""
+		if wiki_url in self._entries:
+			return
+		if wiki_url in self._in_flight:  # removed and added back during its poll, reschedule will put it into the heap
+			self._entries[wiki_url] = None
+		else:
+			self._push(wiki_url, time.monotonic() + delay)
+
+	def remove(self, wiki_url: str):
+		self._discard(wiki_url)
+		self._entries.pop(wiki_url, None)
+		self._poked.discard(wiki_url)
+
+	def poke(self, wiki_url: str):
+		"""Makes the wiki due right away, used when IRC feed tells us the wiki has new changes"""
+		if wiki_url not in self._entries:
+			return
+		if self._entries[wiki_url] is None:
+			self._poked.add(wiki_url)
+		elif self._entries[wiki_url][0] > time.monotonic():
+			self._discard(wiki_url)
+			self._push(wiki_url, time.monotonic())
+
+	def reschedule(self, wiki_url: str, interval: float):
+		"""Puts the wiki back into the schedule after it has been polled"""
+		self._in_flight.discard(wiki_url)
+		if wiki_url not in self._entries:  # wiki has been removed while being polled
+			return
+		if wiki_url in self._poked:
+			self._poked.discard(wiki_url)
+			interval = 0.0
+		self._discard(wiki_url)
+		self._push(wiki_url, time.monotonic() + interval)
+
+	def _first(self) -> Optional[list]:
+		while self._heap and self._heap[0][2] is None:
+			heapq.heappop(self._heap)
+		return self._heap[0] if self._heap else None
+
+	async def take_next(self, max_wait: float) -> Optional[str]:
+		"""Waits at most max_wait seconds for the first wiki to become due and takes it out of the heap
+
+		:returns wiki url or None if nothing became due in given time"""
+		entry = self._first()
+		delay = max_wait if entry is None else entry[0] - time.monotonic()
+		if delay > 0:
+			self._changed.clear()
+			try:
+				await asyncio.wait_for(self._changed.wait(), timeout=min(delay, max_wait))
+			except asyncio.TimeoutError:
+				pass
+			entry = self._first()
+			if entry is None or entry[0] > time.monotonic():
+				return None
+		heapq.heappop(self._heap)
+		self._entries[entry[2]] = None
+		self._in_flight.add(entry[2])
+		return entry[2]
+
+	def snapshot(self) -> list:
+		"""Returns a list of (wiki url, seconds until the wiki is due) sorted by due time, None for wikis being polled"""
+		now = time.monotonic()
+		schedule = [(wiki_url, None if entry is None else round(entry[0] - now, 1)) for wiki_url, entry in self._entries.items()]
+		schedule.sort(key=lambda item: float("-inf") if item[1] is None else item[1])
+		return schedule
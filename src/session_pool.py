@@ -0,0 +1,64 @@
+import logging
+from collections import defaultdict
+from functools import partial
+
+import aiohttp
+
+from src.config import settings
+
+logger = logging.getLogger("rcgcdb.session_pool")
+
+
+class SessionPool:
+	"""Keeps a single long-lived aiohttp session per domain group so that TCP/TLS connections and DNS lookups are
+	reused between wiki polls instead of being set up for every request."""
+	def __init__(self):
+		self.sessions = {}
+		self.stats = defaultdict(lambda: {"created": 0, "reused": 0})
+
+	def get(self, group: str) -> aiohttp.ClientSession:
+		"""Returns the session for given domain group, creating it on first use"""
+		session = self.sessions.get(group)
+		if session is None or session.closed:
+			session = self.sessions[group] = self._create_session(group)
+		return session
+
+	def _create_session(self, group: str) -> aiohttp.ClientSession:
+		pool_settings = settings.get("connection_pool", {})
+		connector = aiohttp.TCPConnector(limit=pool_settings.get("limit", 100),
+		                                 limit_per_host=pool_settings.get("limit_per_host", 8),
+		                                 ttl_dns_cache=pool_settings.get("dns_cache_ttl", 600),
+		                                 keepalive_timeout=pool_settings.get("keepalive_timeout", 60))
+		trace_config = aiohttp.TraceConfig()
+		trace_config.on_connection_create_end.append(partial(self._count_connection, group, "created"))
+		trace_config.on_connection_reuseconn.append(partial(self._count_connection, group, "reused"))
+		logger.debug("Creating a new connection pool for {}".format(group))
+		return aiohttp.ClientSession(connector=connector, headers=settings["header"], timeout=aiohttp.ClientTimeout(6.0),
+		                             trace_configs=[trace_config])
+
+	async def _count_connection(self, group, kind, session, trace_config_ctx, params):
+		self.stats[group][kind] += 1
+
+	def reuse_ratio(self, group: str) -> float:
+		"""Returns the fraction of requests in given group that were served by an already open connection"""
+		total = self.stats[group]["created"] + self.stats[group]["reused"]
+		if total == 0:
+			return 0.0
+		return self.stats[group]["reused"] / total
+
+	def statistics(self) -> dict:
+		return {group: dict(stats, reuse_ratio=round(self.reuse_ratio(group), 3)) for group, stats in self.stats.items()}
+
+	async def close(self, group: str):
+		session = self.sessions.pop(group, None)
+		if session is not None:
+			logger.debug("Closing connection pool for {}, connection statistics: {}".format(group, self.stats[group]))
+			await session.close()
+		self.stats.pop(group, None)
+
+	async def close_all(self):
+		for group in list(self.sessions.keys()):
+			await self.close(group)
+
+
+session_pool = SessionPool()
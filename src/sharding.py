@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+import zlib
+
+from src.config import settings
+from src.database import db
+
+logger = logging.getLogger("rcgcdb.sharding")
+
+
+class ShardLeases:
+	"""Splits wikis into a fixed number of shards by hash of their URL and holds leases on some of them in the database,
+	so that multiple RcGcDb processes (on one or many hosts) never poll the same wiki at the same time.
+
+	Every worker renews its leases on each heartbeat and takes at most its fair share of shards. A shard is considered
+	owned locally only for half of the lease time after the last successful renewal, while other workers can take it
+	over only after the whole lease time passes, which leaves a safety gap for polls still in progress. Shards given away
+	to other workers are dropped locally right away but released in the database on the next heartbeat for the same reason,
+	once before_release confirmed that polls of their wikis finished and their progress is saved.
+	Without sharding setting (or with a single shard) every wiki is owned by this process and the database is not used."""
+	def __init__(self):
+		config = settings.get("sharding", {})
+		self.shards: int = config.get("shards", 1)
+		self.enabled: bool = self.shards > 1
+		self.ttl: float = float(config.get("lease_ttl", 60))
+		self.worker_id: str = config.get("worker_id") or "{}:{}:{}".format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+		self.owned = set()
+		self.to_release = set()
+		self.valid_until = 0.0
+		self.generation = 0  # incremented whenever the set of owned shards changes
+		self.before_release = None  # coroutine function called with shards about to be released, False keeps them for now
+
+	def shard_of(self, wiki_url: str) -> int:
+		return zlib.crc32(wiki_url.encode("utf-8")) % self.shards
+
+	def owns(self, wiki_url: str) -> bool:
+		"""Checks if this process is allowed to poll given wiki"""
+		if not self.enabled:
+			return True
+		return time.monotonic() < self.valid_until and self.shard_of(wiki_url) in self.owned
+
+	def assigned(self, wiki_url: str) -> bool:
+		"""Checks if given wiki belongs to a shard of this process, even if its lease wasn't renewed in time"""
+		if not self.enabled:
+			return True
+		return self.shard_of(wiki_url) in self.owned
+
+	def share(self) -> float:
+		"""Returns the fraction of all wikis this process is responsible for"""
+		if not self.enabled:
+			return 1.0
+		return len(self.owned) / self.shards
+
+	async def setup(self):
+		async with db.pool().acquire() as connection:
+			async with connection.transaction():
+				await connection.execute("CREATE TABLE IF NOT EXISTS rcgcdb_leases (shard integer PRIMARY KEY, owner text, expires timestamptz)")
+				await connection.execute("CREATE TABLE IF NOT EXISTS rcgcdb_workers (worker text PRIMARY KEY, heartbeat timestamptz NOT NULL)")
+				await connection.execute("INSERT INTO rcgcdb_leases (shard) SELECT generate_series(0, $1 - 1) ON CONFLICT DO NOTHING", self.shards)
+		logger.info("Sharding enabled with {} shards, this worker is {}.".format(self.shards, self.worker_id))
+
+	async def heartbeat(self):
+		"""Renews owned leases and claims or gives away shards so that every live worker has a fair share of them"""
+		started = time.monotonic()
+		releasing = set(self.to_release)
+		if releasing and self.before_release is not None and not await self.before_release(releasing):
+			logger.info("Polls of shards {} are still running, releasing them on the next heartbeat.".format(releasing))
+			releasing = set()
+		async with db.pool().acquire() as connection:
+			async with connection.transaction():
+				await connection.execute("INSERT INTO rcgcdb_workers (worker, heartbeat) VALUES ($1, now()) ON CONFLICT (worker) DO UPDATE SET heartbeat = now()", self.worker_id)
+				await connection.execute("DELETE FROM rcgcdb_workers WHERE heartbeat < now() - make_interval(secs => $1)", self.ttl)
+				workers = await connection.fetchval("SELECT count(*) FROM rcgcdb_workers")
+				if releasing:
+					await connection.execute("UPDATE rcgcdb_leases SET owner = NULL, expires = NULL WHERE owner = $1 AND shard = ANY($2::integer[])", self.worker_id, list(releasing))
+					self.to_release -= releasing
+				renewed = await connection.fetch("UPDATE rcgcdb_leases SET expires = now() + make_interval(secs => $2) WHERE owner = $1 AND shard < $3 RETURNING shard", self.worker_id, self.ttl, self.shards)
+				owned = {row["shard"] for row in renewed} - self.to_release  # given away, kept only until released
+				lost = self.owned - owned
+				if lost:
+					logger.warning("Leases on shards {} have been lost.".format(lost))
+				fair_share = math.ceil(self.shards / max(workers, 1))
+				if len(owned) > fair_share:  # other workers joined, give them some shards on the next heartbeat
+					given_away = set(sorted(owned)[fair_share:])
+					owned -= given_away
+					self.to_release |= given_away
+					logger.info("Giving away shards {} to other workers.".format(given_away))
+				elif len(owned) < fair_share:
+					claimed = await connection.fetch("UPDATE rcgcdb_leases SET owner = $1, expires = now() + make_interval(secs => $2) WHERE shard IN "
+					                                 "(SELECT shard FROM rcgcdb_leases WHERE shard < $4 AND (owner IS NULL OR expires < now()) ORDER BY shard LIMIT $3 FOR UPDATE SKIP LOCKED) RETURNING shard",
+					                                 self.worker_id, self.ttl, fair_share - len(owned), self.shards)
+					if claimed:
+						logger.info("Claimed shards {}.".format([row["shard"] for row in claimed]))
+					owned.update(row["shard"] for row in claimed)
+		if owned != self.owned or started >= self.valid_until:  # wikis may have been dropped while the leases lapsed
+			self.generation += 1
+		self.owned = owned
+		self.valid_until = started + self.ttl / 2
+
+	async def run(self):
+		"""Keeps the leases alive until cancelled, then releases them"""
+		try:
+			while True:
+				await asyncio.sleep(self.ttl / 4)
+				try:
+					await self.heartbeat()
+				except asyncio.CancelledError:
+					raise
+				except Exception:
+					logger.exception("Could not renew shard leases, will stop polling once they expire.")
+		except asyncio.CancelledError:
+			self.valid_until = 0.0
+			async with db.pool().acquire() as connection:
+				await connection.execute("UPDATE rcgcdb_leases SET owner = NULL, expires = NULL WHERE owner = $1", self.worker_id)
+				await connection.execute("DELETE FROM rcgcdb_workers WHERE worker = $1", self.worker_id)
+			raise
+
+
+shard_leases = ShardLeases()
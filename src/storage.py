@@ -0,0 +1,177 @@
+"""Data access layer, every query on wikis and their subscriptions goes through here.
+
+Schema:
+	wikis - state of every wiki: its domain group, last processed rcid and discussion post, failure count
+	subscriptions - webhooks subscribed to a wiki with their language and display settings, rc/feeds say whether
+	recent changes and discussions are sent to the webhook
+rcgcdw is kept as a view over both tables for frontends, writes to it are translated by rcgcdw_write trigger.
+Run start.py --migrate to convert the old rcgcdw table."""
+import logging
+from typing import Iterable, Optional
+
+from src.database import db
+
+logger = logging.getLogger("rcgcdb.storage")
+
+SCHEMA = ["""CREATE OR REPLACE FUNCTION rcgcdb_domain(url text) RETURNS text AS $$
+	-- same as src.misc.get_domain: last two dot separated parts of scheme://netloc
+	SELECT COALESCE(array_to_string(labels[greatest(array_length(labels, 1) - 1, 1):], '.'), '')
+	FROM (SELECT string_to_array(lower(substring(url FROM '^([A-Za-z][A-Za-z0-9+.-]*):')) || '://' || substring(url FROM '^[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)'), '.') AS labels) AS parts
+$$ LANGUAGE sql IMMUTABLE""",
+"""CREATE TABLE IF NOT EXISTS wikis (
+	wiki text PRIMARY KEY,
+	domain text NOT NULL,
+	rcid integer,
+	postid text,
+	fail_times integer NOT NULL DEFAULT 0
+)""",
+"CREATE INDEX IF NOT EXISTS wikis_domain ON wikis (domain)",
+"UPDATE wikis SET domain = rcgcdb_domain(wiki) WHERE domain != rcgcdb_domain(wiki)",  # rows saved by older versions of the function
+"""CREATE TABLE IF NOT EXISTS subscriptions (
+	webhook text NOT NULL,
+	wiki text NOT NULL REFERENCES wikis (wiki) ON DELETE CASCADE,
+	lang text NOT NULL DEFAULT 'en',
+	display integer NOT NULL DEFAULT 1,
+	buttons text,
+	rc boolean NOT NULL DEFAULT true,
+	feeds boolean NOT NULL DEFAULT true,
+	PRIMARY KEY (webhook, wiki)
+)""",
+"CREATE INDEX IF NOT EXISTS subscriptions_wiki ON subscriptions (wiki)"]
+
+COMPATIBILITY_VIEW = ["""CREATE OR REPLACE VIEW rcgcdw AS
+	SELECT s.wiki, s.webhook, s.lang, s.display, s.buttons, CASE WHEN s.rc THEN w.rcid ELSE -1 END AS rcid,
+		CASE WHEN s.feeds THEN w.postid ELSE '-1' END AS postid
+	FROM subscriptions s JOIN wikis w USING (wiki)""",
+"""CREATE OR REPLACE FUNCTION rcgcdw_write() RETURNS trigger AS $$
+BEGIN
+	IF TG_OP != 'INSERT' THEN
+		DELETE FROM subscriptions WHERE webhook = OLD.webhook AND wiki = OLD.wiki;
+		IF TG_OP = 'DELETE' OR NEW.wiki != OLD.wiki THEN  -- state of a wiki nobody is subscribed to anymore
+			DELETE FROM wikis WHERE wiki = OLD.wiki AND NOT EXISTS (SELECT 1 FROM subscriptions WHERE wiki = OLD.wiki);
+		END IF;
+	END IF;
+	IF TG_OP = 'DELETE' THEN
+		RETURN OLD;
+	END IF;
+	INSERT INTO wikis (wiki, domain) VALUES (NEW.wiki, rcgcdb_domain(NEW.wiki)) ON CONFLICT (wiki) DO NOTHING;
+	-- NULL means the feed has been (re)enabled, start from the newest change instead of sending the backlog
+	IF NEW.rcid IS NULL THEN
+		UPDATE wikis SET rcid = NULL WHERE wiki = NEW.wiki AND NOT EXISTS (SELECT 1 FROM subscriptions WHERE wiki = NEW.wiki AND rc);
+	END IF;
+	IF NEW.postid IS NULL THEN
+		UPDATE wikis SET postid = NULL WHERE wiki = NEW.wiki AND NOT EXISTS (SELECT 1 FROM subscriptions WHERE wiki = NEW.wiki AND feeds);
+	END IF;
+	INSERT INTO subscriptions (webhook, wiki, lang, display, buttons, rc, feeds)
+		VALUES (NEW.webhook, NEW.wiki, COALESCE(NEW.lang, 'en'), COALESCE(NEW.display, 1), NEW.buttons,
+		        NEW.rcid IS DISTINCT FROM -1, NEW.postid IS DISTINCT FROM '-1');
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql""",
+"DROP TRIGGER IF EXISTS rcgcdw_write ON rcgcdw",
+"CREATE TRIGGER rcgcdw_write INSTEAD OF INSERT OR UPDATE OR DELETE ON rcgcdw FOR EACH ROW EXECUTE PROCEDURE rcgcdw_write()"]
+
+
+async def migrate():
+	"""Creates the schema and moves subscriptions from the old rcgcdw table, which is kept as rcgcdw_legacy"""
+	async with db.pool().acquire() as connection:
+		async with connection.transaction():
+			for statement in SCHEMA:
+				await connection.execute(statement)
+			if await connection.fetchval("SELECT relkind = 'r' FROM pg_class WHERE oid = to_regclass('rcgcdw')"):  # a table, not the view yet
+				await connection.execute("""INSERT INTO wikis (wiki, domain, rcid, postid)
+					SELECT wiki, rcgcdb_domain(wiki), max(rcid) FILTER (WHERE rcid != -1), max(postid::bigint) FILTER (WHERE postid != '-1')::text
+					FROM rcgcdw GROUP BY wiki ON CONFLICT (wiki) DO NOTHING""")
+				result = await connection.execute("""INSERT INTO subscriptions (webhook, wiki, lang, display, buttons, rc, feeds)
+					SELECT webhook, wiki, COALESCE(lang, 'en'), COALESCE(display, 1), buttons, rcid IS DISTINCT FROM -1, postid IS DISTINCT FROM '-1'
+					FROM rcgcdw ON CONFLICT DO NOTHING""")
+				await connection.execute("DROP TRIGGER IF EXISTS rcgcdb_subscriptions ON rcgcdw")
+				await connection.execute("ALTER TABLE rcgcdw RENAME TO rcgcdw_legacy")
+				logger.info("Migrated rcgcdw table ({}), old data is kept in rcgcdw_legacy.".format(result))
+			for statement in COMPATIBILITY_VIEW:
+				await connection.execute(statement)
+	logger.info("Database schema is up to date.")
+
+
+async def schema_ready() -> bool:
+	async with db.pool().acquire() as connection:
+		return await connection.fetchval("SELECT to_regclass('subscriptions') IS NOT NULL")
+
+
+async def wiki_states() -> list:
+	"""Returns wiki, rcid, postid, fail_times, rc and feeds (whether any subscription wants recent changes or
+	discussions) of every wiki"""
+	async with db.pool().acquire() as connection:
+		return await connection.fetch("SELECT wiki, rcid, postid, fail_times, EXISTS (SELECT 1 FROM subscriptions s WHERE s.wiki = w.wiki AND s.rc) AS rc, "
+		                              "EXISTS (SELECT 1 FROM subscriptions s WHERE s.wiki = w.wiki AND s.feeds) AS feeds FROM wikis w")
+
+
+async def rc_wikis(wikis: Optional[Iterable[str]] = None) -> list:
+	"""Returns wiki and rcid of wikis that have recent changes enabled, optionally limited to given wikis"""
+	async with db.pool().acquire() as connection:
+		if wikis is None:
+			return await connection.fetch("SELECT wiki, rcid FROM wikis w WHERE EXISTS (SELECT 1 FROM subscriptions s WHERE s.wiki = w.wiki AND s.rc)")
+		return await connection.fetch("SELECT wiki, rcid FROM wikis w WHERE wiki = ANY($1::text[]) AND EXISTS (SELECT 1 FROM subscriptions s WHERE s.wiki = w.wiki AND s.rc)", list(wikis))
+
+
+async def feeds_wikis() -> list:
+	"""Returns wiki, rcid, postid and rc of wikis that have discussions enabled"""
+	async with db.pool().acquire() as connection:
+		return await connection.fetch("SELECT wiki, rcid, postid, EXISTS (SELECT 1 FROM subscriptions s WHERE s.wiki = w.wiki AND s.rc) AS rc FROM wikis w "
+		                              "WHERE EXISTS (SELECT 1 FROM subscriptions s WHERE s.wiki = w.wiki AND s.feeds)")
+
+
+async def domain_has_wikis(domain: str) -> bool:
+	async with db.pool().acquire() as connection:
+		return await connection.fetchval("SELECT EXISTS (SELECT 1 FROM wikis w WHERE domain = $1 AND EXISTS (SELECT 1 FROM subscriptions s WHERE s.wiki = w.wiki AND s.rc))", domain)
+
+
+async def subscriptions(wikis: Optional[Iterable[str]] = None) -> list:
+	"""Returns wiki, webhook, lang, display, buttons, rc and feeds of every subscription, optionally limited to given wikis"""
+	async with db.pool().acquire() as connection:
+		if wikis is None:
+			return await connection.fetch("SELECT wiki, webhook, lang, display, buttons, rc, feeds FROM subscriptions")
+		return await connection.fetch("SELECT wiki, webhook, lang, display, buttons, rc, feeds FROM subscriptions WHERE wiki = ANY($1::text[])", list(wikis))
+
+
+async def observers(wiki_url: str) -> list:
+	"""Returns webhook and lang of every subscription of given wiki"""
+	async with db.pool().acquire() as connection:
+		return await connection.fetch("SELECT webhook, lang FROM subscriptions WHERE wiki = $1", wiki_url)
+
+
+async def disable_feeds(wiki_url: str):
+	async with db.pool().acquire() as connection:
+		await connection.execute("UPDATE subscriptions SET feeds = false WHERE wiki = $1", wiki_url)
+
+
+async def remove_wiki(wiki_url: str) -> str:
+	"""Removes a wiki with all of its subscriptions, returns the command status"""
+	async with db.pool().acquire() as connection:
+		return await connection.execute("DELETE FROM wikis WHERE wiki = $1", wiki_url)
+
+
+async def remove_webhook(webhook: str):
+	async with db.pool().acquire() as connection:
+		async with connection.transaction():
+			wikis = await connection.fetch("DELETE FROM subscriptions WHERE webhook = $1 RETURNING wiki", webhook)
+			await connection.execute("DELETE FROM wikis w WHERE wiki = ANY($1::text[]) AND NOT EXISTS (SELECT 1 FROM subscriptions s WHERE s.wiki = w.wiki)",
+			                         [row["wiki"] for row in wikis])
+
+
+async def save_fail_times(wiki_url: str, fail_times: int):
+	async with db.pool().acquire() as connection:
+		await connection.execute("UPDATE wikis SET fail_times = $2 WHERE wiki = $1", wiki_url, fail_times)
+
+
+async def save_checkpoints(rcids: dict, postids: dict):
+	"""Saves last processed rcid and discussion post id of given wikis, both given as wiki: value dicts.
+	Neither of them moves backwards, a worker that lost its shard may still write a stale one."""
+	async with db.pool().acquire() as connection:
+		async with connection.transaction():
+			if rcids:
+				await connection.execute("UPDATE wikis AS w SET rcid = u.rcid FROM unnest($1::text[], $2::integer[]) AS u (wiki, rcid) "
+				                         "WHERE w.wiki = u.wiki AND (w.rcid IS NULL OR w.rcid < u.rcid)", list(rcids.keys()), list(rcids.values()))
+			if postids:
+				await connection.execute("UPDATE wikis AS w SET postid = u.postid FROM unnest($1::text[], $2::text[]) AS u (wiki, postid) "
+				                         "WHERE w.wiki = u.wiki AND (w.postid IS NULL OR w.postid::bigint < u.postid::bigint)", list(postids.keys()), list(postids.values()))
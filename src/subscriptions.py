@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Optional
+
+import asyncpg
+
+from src.database import db
+
+logger = logging.getLogger("rcgcdb.subscriptions")
+
+NOTIFY_FUNCTION = """CREATE OR REPLACE FUNCTION rcgcdb_notify_subscription() RETURNS trigger AS $$
+BEGIN
+	IF TG_OP != 'INSERT' THEN
+		PERFORM pg_notify('rcgcdb_subscriptions', OLD.wiki);
+	END IF;
+	IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.wiki != OLD.wiki) THEN
+		PERFORM pg_notify('rcgcdb_subscriptions', NEW.wiki);
+	END IF;
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql"""
+
+
+class SubscriptionFeed:
+	"""Collects URLs of wikis whose subscriptions were added, removed or changed, as reported by a trigger on subscriptions
+	table through LISTEN/NOTIFY. Checkpoints live in wikis table so their updates are not reported."""
+	channel = "rcgcdb_subscriptions"
+
+	def __init__(self):
+		self.connection: Optional[asyncpg.Connection] = None
+		self.changed = set()
+		self.event: Optional[asyncio.Event] = None  # created on first use, within the running event loop
+		self.notifications = 0
+
+	async def setup(self):
+		"""Installs the trigger, it's replaced on every start so changes to the function get applied"""
+		async with db.pool().acquire() as connection:
+			async with connection.transaction():
+				await connection.execute(NOTIFY_FUNCTION)
+				await connection.execute("DROP TRIGGER IF EXISTS rcgcdb_subscriptions ON subscriptions")
+				await connection.execute("CREATE TRIGGER rcgcdb_subscriptions AFTER INSERT OR UPDATE OR DELETE ON subscriptions "
+				                         "FOR EACH ROW EXECUTE PROCEDURE rcgcdb_notify_subscription()")
+
+	def on_notification(self, connection, pid, channel, payload):
+		self.notifications += 1
+		self.changed.add(payload)
+		self.event.set()
+
+	async def listen(self):
+		if self.event is None:
+			self.event = asyncio.Event()
+		self.connection = await db.dedicated_connection()
+		await self.connection.add_listener(self.channel, self.on_notification)
+		logger.debug("Listening for subscription changes.")
+
+	async def changes(self, timeout: float) -> Optional[set]:
+		"""Waits at most timeout seconds for subscription changes and returns URLs of changed wikis.
+
+		:returns set of wiki URLs or None if notifications could have been missed (the listener (re)connected) and the
+		caller should reconcile everything"""
+		if self.connection is None or self.connection.is_closed():
+			self.changed.clear()
+			try:
+				await self.listen()
+			except (OSError, asyncpg.PostgresError):
+				logger.exception("Could not listen for subscription changes, will retry.")
+				self.connection = None
+				await asyncio.sleep(timeout)
+			return None
+		try:
+			await asyncio.wait_for(self.event.wait(), timeout=timeout)
+			await asyncio.sleep(1.0)  # let bulk changes gather into a single update
+		except asyncio.TimeoutError:
+			pass
+		self.event.clear()
+		changed, self.changed = self.changed, set()
+		return changed
+
+	async def close(self):
+		if self.connection is not None and not self.connection.is_closed():
+			await self.connection.close()
+
+
+subscription_feed = SubscriptionFeed()
@@ -0,0 +1,74 @@
+import logging
+from collections import defaultdict
+
+from src import storage
+
+logger = logging.getLogger("rcgcdb.targets")
+
+
+class TargetIndex:
+	"""In-memory index of webhooks subscribed to every wiki, grouped by (lang, display, buttons) combinations, so that
+	a scan can find where to send its messages without asking the DB.
+
+	It's loaded at startup, refreshed for wikis reported by the subscription sync and reloaded on full reconciliation.
+	Lists of webhooks are never modified in place since messages already created may keep a reference to them."""
+	def __init__(self):
+		self.rc = {}  # wiki url: {(lang, display, buttons): [webhooks]} of subscriptions with RC enabled
+		self.feeds = {}  # same for subscriptions with discussions enabled
+		self.webhooks = defaultdict(set)  # webhook: wiki urls it's subscribed to
+
+	@staticmethod
+	def _build(rows) -> tuple:
+		rc, feeds = defaultdict(lambda: defaultdict(list)), defaultdict(lambda: defaultdict(list))
+		webhooks = defaultdict(set)
+		for row in rows:
+			combination = (row["lang"], row["display"], row["buttons"])
+			if row["rc"]:
+				rc[row["wiki"]][combination].append(row["webhook"])
+			if row["feeds"]:
+				feeds[row["wiki"]][combination].append(row["webhook"])
+			webhooks[row["webhook"]].add(row["wiki"])
+		return {wiki: dict(combinations) for wiki, combinations in rc.items()}, {wiki: dict(combinations) for wiki, combinations in feeds.items()}, webhooks
+
+	async def load(self):
+		"""Rebuilds the whole index from the DB"""
+		self.rc, self.feeds, self.webhooks = self._build(await storage.subscriptions())
+		logger.debug("Loaded targets of {} wikis.".format(len(self.rc)))
+
+	async def update(self, wikis: set):
+		"""Reloads entries of given wikis only"""
+		rc, feeds, webhooks = self._build(await storage.subscriptions(wikis))
+		for wiki in wikis:
+			self.remove_wiki(wiki)
+		self.rc.update(rc)
+		self.feeds.update(feeds)
+		for webhook, webhook_wikis in webhooks.items():
+			self.webhooks[webhook].update(webhook_wikis)
+
+	def remove_wiki(self, wiki_url: str):
+		for combinations in (self.rc.pop(wiki_url, {}), self.feeds.pop(wiki_url, {})):
+			for webhooks in combinations.values():
+				for webhook in webhooks:
+					self.webhooks[webhook].discard(wiki_url)
+					if not self.webhooks[webhook]:
+						del self.webhooks[webhook]
+
+	def remove_webhook(self, webhook: str):
+		"""Drops a deleted webhook from every wiki it was subscribed to"""
+		for wiki_url in self.webhooks.pop(webhook, ()):
+			for index in (self.rc, self.feeds):
+				if wiki_url not in index:
+					continue
+				combinations = {combination: [hook for hook in webhooks if hook != webhook] for combination, webhooks in index[wiki_url].items()}
+				index[wiki_url] = {combination: webhooks for combination, webhooks in combinations.items() if webhooks}
+
+	def rc_targets(self, wiki_url: str) -> dict:
+		"""Returns {(lang, display, buttons): [webhooks]} for recent changes of given wiki"""
+		return self.rc.get(wiki_url, {})
+
+	def feeds_targets(self, wiki_url: str) -> dict:
+		"""Returns {(lang, display, buttons): [webhooks]} for discussions of given wiki"""
+		return self.feeds.get(wiki_url, {})
+
+
+target_index = TargetIndex()
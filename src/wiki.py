@@ -1,16 +1,22 @@
 from dataclasses import dataclass
+from typing import Optional
 import re
 import logging, aiohttp
 from src.exceptions import *
-from src.database import db
+from src import storage, codec
 from src.formatters.rc import embed_formatter, compact_formatter
 from src.formatters.discussions import feeds_embed_formatter, feeds_compact_formatter
-from src.misc import parse_link
+from src.misc import parse_link, get_domain, parse_recent_changes, RenderingContext
 from src.i18n import langs
 from src.wiki_ratelimiter import RateLimiter
+from src.session_pool import session_pool
+from src.enrichment import ScanEnrichment
+from src.targets import target_index
 import sqlite3
 import src.discord
 import asyncio
+import math
+import time
 from src.config import settings
 # noinspection PyPackageRequirements
 from bs4 import BeautifulSoup
@@ -22,58 +28,99 @@ logger = logging.getLogger("rcgcdb.wiki")
 class Wiki:
 	mw_messages: int = None
 	fail_times: int = 0  # corresponding to amount of times connection with wiki failed for client reasons (400-499)
-	session: aiohttp.ClientSession = None
+	session: aiohttp.ClientSession = None  # shared connection pool of the wiki's domain group
 	rc_active: int = 0
 	last_check: float = 0.0
 	last_discussion_check: float = 0.0
 
+	namespaces: dict = None
+	tags: dict = None
+	article_path: str = None
+	metadata_timestamp: float = 0.0  # time of the last siteinfo/tags refresh
+	context: RenderingContext = None  # paths, namespaces and tags for formatters, rebuilt with the metadata
+	last_timestamp: str = None  # timestamp of the newest processed change, used as rcstart for forward paging
+	event_rate: float = None  # moving average of new changes per second, None until two checks were made
+
 	@staticmethod
-	async def fetch_wiki(extended, script_path, session: aiohttp.ClientSession, ratelimiter: RateLimiter, amount=20) -> aiohttp.ClientResponse:
-		await ratelimiter.timeout_wait()
+	async def fetch_wiki(extended, script_path, session: aiohttp.ClientSession, ratelimiter: RateLimiter, amount=20, metadata=True,
+	                     rcstart=None, rccontinue=None) -> aiohttp.ClientResponse:
 		url_path = script_path + "api.php"
+		await ratelimiter.acquire(url_path)
+		params = {"action": "query", "format": "json", "uselang": "content", "list": "recentchanges", "utf8": 1,
+		          "rcshow": "!bot", "rcprop": "title|redirect|timestamp|ids|loginfo|parsedcomment|sizes|flags|tags|user|userid",
+		          "rclimit": amount, "rctype": "edit|new|log|categorize"}
+		meta = []
+		if metadata:  # namespaces and tags are cached, only ask for them when the cache is outdated
+			meta.append("siteinfo")
+			params.update({"list": "tags|recentchanges", "tglimit": "max", "tgprop": "displayname", "siprop": "namespaces|general"})
 		if extended:
-			params = {"action": "query", "format": "json", "uselang": "content", "list": "tags|recentchanges",
-			          "meta": "allmessages|siteinfo",
-			          "utf8": 1, "tglimit": "max", "tgprop": "displayname",
-			          "rcprop": "title|redirect|timestamp|ids|loginfo|parsedcomment|sizes|flags|tags|user|userid",
-			          "rclimit": amount, "rcshow": "!bot", "rctype": "edit|new|log|categorize",
-			          "ammessages": "recentchanges-page-added-to-category|recentchanges-page-removed-from-category|recentchanges-page-added-to-category-bundled|recentchanges-page-removed-from-category-bundled",
-			          "amenableparser": 1, "amincludelocal": 1, "siprop": "namespaces|general"}
-		else:
-			params = {"action": "query", "format": "json", "uselang": "content", "list": "tags|recentchanges",
-			          "meta": "siteinfo", "utf8": 1,
-			          "tglimit": "max", "rcshow": "!bot", "tgprop": "displayname",
-			          "rcprop": "title|redirect|timestamp|ids|loginfo|parsedcomment|sizes|flags|tags|user|userid",
-			          "rclimit": amount, "rctype": "edit|new|log|categorize", "siprop": "namespaces|general"}
+			meta.append("allmessages")
+			params.update({"ammessages": "recentchanges-page-added-to-category|recentchanges-page-removed-from-category|recentchanges-page-added-to-category-bundled|recentchanges-page-removed-from-category-bundled",
+			               "amenableparser": 1, "amincludelocal": 1})
+		if meta:
+			params["meta"] = "|".join(meta)
+		if rcstart is not None:  # go forward from the last change we have seen instead of getting newest changes
+			params.update({"rcdir": "newer", "rcstart": rcstart})
+		if rccontinue is not None:
+			params["rccontinue"] = rccontinue
 		try:
 			response = await session.get(url_path, params=params)
-			ratelimiter.timeout_add(1.0)
 		except (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError, asyncio.TimeoutError, aiohttp.TooManyRedirects):
 			logger.error("A connection error occurred while requesting {}".format(url_path))
 			raise WikiServerError
 		return response
 
+	async def fetch_continuation(self, script_path, session: aiohttp.ClientSession, ratelimiter: RateLimiter, amount, rccontinue) -> tuple:
+		"""Fetches the next page of recent changes for given rccontinue value
+
+		:returns the same tuple as parse_recent_changes"""
+		response = await self.fetch_wiki(False, script_path, session, ratelimiter, amount=amount, metadata=False,
+		                                 rcstart=self.last_timestamp, rccontinue=rccontinue)
+		async with response:
+			if response.status != 200 or "json" not in response.content_type:
+				raise WikiServerError
+			try:
+				return parse_recent_changes(await read_response(response), self.rc_active)
+			except (ResponseTooLarge, asyncio.TimeoutError, aiohttp.ClientPayloadError, ValueError):
+				raise WikiServerError
+
+	def rc_limit(self) -> int:
+		"""Estimates how many changes happened since the last check so that one request is usually enough to catch up"""
+		if self.event_rate is None and self.rc_active and self.rc_active > 0:
+			return 500  # nothing measured yet, like after a restart, the backlog since the saved rcid can be of any size
+		if not self.last_check or self.event_rate is None:
+			return 20
+		expected = self.event_rate * (time.time() - self.last_check)
+		return max(20, min(500, math.ceil(expected * 1.5)))
+
+	def update_activity(self, new_events: int):
+		"""Updates the moving average of change rate on the wiki and saves the time of the check"""
+		now = time.time()
+		if self.last_check:
+			sample = new_events / max(now - self.last_check, 1.0)
+			self.event_rate = sample if self.event_rate is None else 0.3 * sample + 0.7 * self.event_rate
+		self.last_check = now
+
 	@staticmethod
-	async def fetch_feeds(wiki, session: aiohttp.ClientSession) -> aiohttp.ClientResponse:
+	async def fetch_feeds(wiki, session: aiohttp.ClientSession, ratelimiter: RateLimiter) -> aiohttp.ClientResponse:
 		url_path = "{wiki}wikia.php".format(wiki=wiki)
+		await ratelimiter.acquire(url_path)
 		params = {"controller": "DiscussionPost", "method": "getPosts", "includeCounters": "false", "sortDirection": "descending", "sortKey": "creation_date", "limit": 20}
 		try:
-			response = await session.get(url_path, params=params)
+			response = await session.get(url_path, params=params, headers={"Accept": "application/hal+json"})
 			response.raise_for_status()
 		except (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError, asyncio.TimeoutError, aiohttp.ClientResponseError, aiohttp.TooManyRedirects):
 			logger.error("A connection error occurred while requesting {}".format(url_path))
 			raise WikiServerError
 		return response
 
-	@staticmethod
-	async def safe_request(url, ratelimiter, *keys):
-		await ratelimiter.timeout_wait()
+	async def safe_request(self, url, ratelimiter: RateLimiter, *keys):
+		await ratelimiter.acquire(url)
+		session = self.session if self.session is not None else session_pool.get(get_domain(url))
 		try:
-			async with aiohttp.ClientSession(headers=settings["header"], timeout=aiohttp.ClientTimeout(6.0)) as session:
-				request = await session.get(url)
-				ratelimiter.timeout_add(1.0)
+			async with session.get(url) as request:
 				request.raise_for_status()
-				json_request = await request.json(encoding="UTF-8")
+				json_request = await request.json(encoding="UTF-8", loads=codec.loads)
 		except (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError, asyncio.TimeoutError, aiohttp.TooManyRedirects):
 			logger.error("Reached connection error for request on link {url}".format(url=url))
 		else:
@@ -86,9 +133,34 @@ class Wiki:
 				return None
 			return json_request
 
+	def metadata_outdated(self) -> bool:
+		"""Checks if cached siteinfo and tags of the wiki should be downloaded again"""
+		return self.article_path is None or self.metadata_timestamp + settings.get("metadata_cache_ttl", 21600) < time.time()
+
+	def update_metadata(self, wiki_url: str, request: dict):
+		"""Stores article path, namespaces and tag display names from the siteinfo/tags API response"""
+		self.article_path = request["query"]["general"]["articlepath"]
+		self.namespaces = request["query"]["namespaces"]
+		self.tags = {}
+		plain_tags = {}
+		for tag in request["query"]["tags"]:
+			self.tags[tag["name"]] = tag.get("displayname")  # hidden tags have no display name
+			plain_tags[tag["name"]] = None if self.tags[tag["name"]] is None else BeautifulSoup(self.tags[tag["name"]], "lxml").get_text()
+		self.context = RenderingContext(wiki_url, self.article_path, self.namespaces, plain_tags)
+		self.metadata_timestamp = time.time()
+
+	def check_metadata(self, change: dict):
+		"""Marks the metadata as outdated when the change uses a namespace or a tag we don't know about yet"""
+		if self.metadata_timestamp + 300 > time.time():  # don't refresh over and over if the wiki itself doesn't list it
+			return
+		if str(change.get("ns")) not in self.namespaces or any(tag not in self.tags for tag in change.get("tags", [])):
+			logger.debug("Unknown namespace or tag in change {}, metadata will be refreshed on next check.".format(change.get("rcid")))
+			self.metadata_timestamp = 0.0
+
 	async def fail_add(self, wiki_url, status):
 		logger.debug("Increasing fail_times to {}".format(self.fail_times+3))
 		self.fail_times += 3
+		await storage.save_fail_times(wiki_url, self.fail_times)
 		if self.fail_times > 120:
 			await self.remove(wiki_url, status)
 
@@ -109,9 +181,9 @@ class Wiki:
 		logger.info("Removing a wiki {}".format(wiki_url))
 		await src.discord.wiki_removal(wiki_url, reason)
 		await src.discord.wiki_removal_monitor(wiki_url, reason)
-		async with db.pool().acquire() as connection:
-			result = await connection.execute('DELETE FROM rcgcdw WHERE wiki = $1', wiki_url)
-		logger.warning('{} rows affected by DELETE FROM rcgcdw WHERE wiki = "{}"'.format(result, wiki_url))
+		result = await storage.remove_wiki(wiki_url)
+		target_index.remove_wiki(wiki_url)
+		logger.warning('{} rows affected by removal of wiki "{}"'.format(result, wiki_url))
 
 	async def pull_comment(self, comment_id, WIKI_API_PATH, rate_limiter):
 		try:
@@ -132,6 +204,19 @@ class Wiki:
 		return ""
 
 
+async def read_response(response: aiohttp.ClientResponse) -> str:
+	"""Reads the body of the response in chunks, refusing to read bodies bigger than max_response_size setting"""
+	limit = settings.get("max_response_size", 8388608)
+	if response.content_length is not None and response.content_length > limit:
+		raise ResponseTooLarge
+	body = bytearray()
+	async for chunk in response.content.iter_chunked(65536):
+		body.extend(chunk)
+		if len(body) > limit:
+			raise ResponseTooLarge
+	return body.decode("utf-8")
+
+
 async def process_cats(event: dict, local_wiki: Wiki, category_msgs: dict, categorize_events: dict):
 	"""Process categories based on local MW messages. """
 	if event["type"] == "categorize":
@@ -192,39 +277,48 @@ async def process_mwmsgs(wiki_response: dict, local_wiki: Wiki, mw_msgs: dict):
 
 
 # db_wiki: webhook, wiki, lang, display, rcid, postid
-async def essential_info(change: dict, changed_categories, local_wiki: Wiki, target: tuple, paths: tuple, request: dict,
-                         rate_limiter: RateLimiter) -> src.discord.DiscordMessage:
-	"""Prepares essential information for both embed and compact message format."""
-	_ = langs[target[0][0]]["wiki"].gettext
-	changed_categories = changed_categories.get(change["revid"], None)
-	#logger.debug("List of categories in essential_info: {}".format(changed_categories))
-	appearance_mode = embed_formatter if target[0][1] > 0 else compact_formatter
+@dataclass
+class ChangeEvent:
+	"""Language-neutral result of analysing a single change, rendered afterwards for every target"""
+	action: str  # identification string like edit or block/block
+	change: dict
+	parsed_comment: Optional[str]  # with links already parsed, None when empty
+	comment_hidden: bool
+	user_hidden: bool
+	categories: Optional[dict]
+
+
+def analyze_change(change: dict, changed_categories: dict, local_wiki: Wiki) -> Optional[ChangeEvent]:
+	"""First stage of preparing messages, does everything that doesn't depend on target's language or display settings.
+
+	:returns ChangeEvent or None when the change shouldn't be sent at all"""
 	if "actionhidden" in change or "suppressed" in change:  # if event is hidden using suppression
-		await appearance_mode("suppressed", change, "", changed_categories, local_wiki, target, paths, rate_limiter)
-		return
-	if "commenthidden" not in change:
-		parsed_comment = parse_link(paths[3], change["parsedcomment"])
-	else:
-		parsed_comment = _("~~hidden~~")
-	if not parsed_comment:
-		parsed_comment = None
+		return None
 	if change["type"] in ["edit", "new"]:
-		if "userhidden" in change:
-			change["user"] = _("hidden")
 		identification_string = change["type"]
 	elif change["type"] == "log":
 		identification_string = "{logtype}/{logaction}".format(logtype=change["logtype"], logaction=change["logaction"])
 	elif change["type"] == "categorize":
-		return
+		return None
 	else:
 		identification_string = change["type"]
-	additional_data = {"namespaces": request["query"]["namespaces"], "tags": {}}
-	for tag in request["query"]["tags"]:
-		try:
-			additional_data["tags"][tag["name"]] = (BeautifulSoup(tag["displayname"], "lxml")).get_text()
-		except KeyError:
-			additional_data["tags"][tag["name"]] = None  # Tags with no displ
-	return await appearance_mode(identification_string, change, parsed_comment, changed_categories, local_wiki, target, paths, rate_limiter, additional_data=additional_data)
+	parsed_comment = None
+	if "commenthidden" not in change:
+		parsed_comment = parse_link(local_wiki.context.just_domain, change["parsedcomment"]) or None
+	return ChangeEvent(action=identification_string, change=change, parsed_comment=parsed_comment,
+	                   comment_hidden="commenthidden" in change, user_hidden="userhidden" in change and change["type"] in ["edit", "new"],
+	                   categories=changed_categories.get(change["revid"], None))
+
+
+async def render_change(event: ChangeEvent, local_wiki: Wiki, target: tuple, enrichment: ScanEnrichment) -> src.discord.DiscordMessage:
+	"""Second stage of preparing messages, formats the analysed change for a single (lang, display, buttons) target"""
+	_ = langs[target[0][0]]["wiki"].gettext
+	appearance_mode = embed_formatter if target[0][1] > 0 else compact_formatter
+	change = event.change
+	if event.user_hidden:  # shared by all targets, so the translated name goes into a copy
+		change = dict(change, user=_("hidden"))
+	parsed_comment = _("~~hidden~~") if event.comment_hidden else event.parsed_comment
+	return await appearance_mode(event.action, change, parsed_comment, event.categories, enrichment, target, local_wiki.context)
 
 
 async def essential_feeds(change: dict, comment_pages: dict, db_wiki: sqlite3.Row, target: tuple) -> src.discord.DiscordMessage:
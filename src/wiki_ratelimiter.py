@@ -1,19 +1,82 @@
 import logging, time, asyncio
+from urllib.parse import urlparse
+
+from src.config import settings
 
 logger = logging.getLogger("rcgcdw.ratelimiter")
 
+
+class TokenBucket:
+	"""Token bucket allowing rate requests per second on average with bursts of up to burst requests"""
+	def __init__(self, rate: float, burst: int):
+		self.rate = rate
+		self.burst = burst
+		self.tokens = float(burst)
+		self.updated = time.monotonic()
+		self.lock = asyncio.Lock()  # waiters are served in order of arrival
+
+	async def take(self):
+		"""Takes a single token from the bucket, waiting for it to be refilled if it's empty"""
+		async with self.lock:
+			now = time.monotonic()
+			self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+			self.updated = now
+			if self.tokens < 1:
+				to_wait = (1 - self.tokens) / self.rate
+				await asyncio.sleep(to_wait)
+				self.tokens = 1.0
+				self.updated = now + to_wait
+			self.tokens -= 1
+
+
 class RateLimiter:
-	def __init__(self):
-		self.timeout_until = 0
-
-	def timeout_add(self, timeout: float):
-		"""This function sets a new timeout"""
-		self.timeout_until = time.time() + timeout
-		#logger.debug("Added {} timeout".format(timeout))
-
-	async def timeout_wait(self):
-		"""This awaitable calculates the time to wait according to timeout_until, does not wait if it's past the timeout to not skip a cycle"""
-		calculated_timeout = self.timeout_until - time.time()
-		#logger.debug("Waiting {}".format(calculated_timeout))
-		if calculated_timeout > 0:
-			await asyncio.sleep(calculated_timeout)
+	"""Limits requests made to wikis of a single domain group, both in total and per single host"""
+	def __init__(self, rate: float = 1.0, burst: int = 1, host_rate: float = None, host_burst: int = None):
+		self.group_bucket = TokenBucket(rate, burst)
+		self.group_rate = rate
+		self.host_rate = host_rate or rate
+		self.host_burst = host_burst or burst
+		self.host_buckets = {}
+		self.requests = 0
+		self.waited_requests = 0
+		self.total_wait = 0.0
+		self.max_wait = 0.0
+
+	async def acquire(self, url: str):
+		"""Waits until a request to given URL is allowed by both the host and the group limit"""
+		start = time.monotonic()
+		host = urlparse(url).netloc
+		if host not in self.host_buckets:
+			self.host_buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+		await self.host_buckets[host].take()
+		await self.group_bucket.take()
+		waited = time.monotonic() - start
+		self.requests += 1
+		if waited > 0.001:
+			self.waited_requests += 1
+			self.total_wait += waited
+			self.max_wait = max(self.max_wait, waited)
+
+	def set_share(self, share: float):
+		"""Scales the group limit down to the fraction of group's wikis this process polls when the work is sharded
+		between several processes, so that all of them together stay within the configured limit"""
+		self.group_bucket.rate = self.group_rate * max(share, 0.01)
+
+	def statistics(self) -> dict:
+		return {"requests": self.requests, "waited": self.waited_requests, "total_wait": round(self.total_wait, 3),
+		        "mean_wait": round(self.total_wait / self.waited_requests, 3) if self.waited_requests else 0.0,
+		        "max_wait": round(self.max_wait, 3)}
+
+
+group_limiters = {}
+
+
+def group_rate_limiter(group: str) -> RateLimiter:
+	"""Returns the rate limiter shared by every request to wikis of given domain group, limits are taken from
+	rate_limits setting for the group or its "default" entry"""
+	if group not in group_limiters:
+		limits = settings.get("rate_limits", {})
+		limits = limits.get(group, limits.get("default", {}))
+		group_limiters[group] = RateLimiter(rate=limits.get("requests_per_second", 1.0), burst=limits.get("burst", 1),
+		                                    host_rate=limits.get("host_requests_per_second"), host_burst=limits.get("host_burst"))
+	return group_limiters[group]